@@ -96,6 +96,21 @@ class Nunchuk:
             self._acceleration(do_read=False),
         )
 
+    def start_read(self) -> None:
+        """Ask for a report without waiting for it.
+
+        Call `finish_read` at least the read delay later to fetch it.
+        """
+        self.I2C.writeto(self._device_address, b"\x00")
+
+    def finish_read(self, buffer: bytearray = None) -> None:
+        """Fetch the report asked for by `start_read`.
+
+        :param bytearray buffer: (Optional) Where to put the report, instead
+            of `buffer`, so it can be read in place without copying.
+        """
+        self.I2C.readfrom_into(self._device_address, self.buffer if buffer is None else buffer)
+
     @property
     def joystick(self) -> _Joystick:
         """The current joystick position."""
@@ -0,0 +1,98 @@
+"""Dirty-rectangle compositor for the Presto display.
+
+Game objects report the screen areas they touched with ``damage()``. Once per
+frame ``flush()`` pushes only those areas with ``Presto.partial_update``, or
+falls back to a single full ``update()`` when most of the screen changed.
+Damage is tracked in playfield coordinates and scaled up to screen pixels
+only when pushed.
+"""
+
+from micropython import const
+
+_MAX_RECTS = const(16)
+
+
+class Compositor(object):
+    """Compositor."""
+
+    def __init__(self, presto, width, height, threshold=0.5, scale=1):
+        """Initialize compositor.
+
+        Args:
+            presto: Presto instance used to push the framebuffer.
+            width (int): Playfield width.
+            height (int): Playfield height.
+            threshold (Optional float): Fraction of the screen that, once
+                damaged, makes a full update cheaper than partial ones.
+            scale (Optional int): Screen pixels per playfield pixel.
+        """
+        self.presto = presto
+        self.width = width
+        self.height = height
+        self.max_area = int(width * height * threshold)
+        self.scale = scale
+        # Preallocated rectangles stored as [x, y, x2, y2] with exclusive ends
+        self.rects = [[0, 0, 0, 0] for _ in range(_MAX_RECTS)]
+        self.count = 0
+        self.full = False
+
+    def damage(self, x, y, width, height):
+        """Mark a rectangle as changed this frame."""
+        if self.full:
+            return
+        x2 = min(x + width, self.width)
+        y2 = min(y + height, self.height)
+        x = max(x, 0)
+        y = max(y, 0)
+        if x2 <= x or y2 <= y:
+            return
+        rects = self.rects
+        i = 0
+        while i < self.count:
+            r = rects[i]
+            if x <= r[2] and x2 >= r[0] and y <= r[3] and y2 >= r[1]:
+                # Overlapping or touching, absorb it and rescan
+                x = min(x, r[0])
+                y = min(y, r[1])
+                x2 = max(x2, r[2])
+                y2 = max(y2, r[3])
+                self.count -= 1
+                rects[i] = rects[self.count]
+                rects[self.count] = r
+                i = 0
+            else:
+                i += 1
+        if self.count == _MAX_RECTS:
+            # Too fragmented to be worth tracking
+            self.full = True
+            return
+        r = rects[self.count]
+        r[0] = x
+        r[1] = y
+        r[2] = x2
+        r[3] = y2
+        self.count += 1
+
+    def invalidate(self):
+        """Force a full update on the next flush."""
+        self.full = True
+
+    def flush(self):
+        """Push all damaged areas to the display."""
+        if not self.full:
+            area = 0
+            for i in range(self.count):
+                r = self.rects[i]
+                area += (r[2] - r[0]) * (r[3] - r[1])
+            if area > self.max_area:
+                self.full = True
+        if self.full:
+            self.presto.update()
+        else:
+            scale = self.scale
+            for i in range(self.count):
+                r = self.rects[i]
+                self.presto.partial_update(r[0] * scale, r[1] * scale,
+                                           (r[2] - r[0]) * scale, (r[3] - r[1]) * scale)
+        self.count = 0
+        self.full = False
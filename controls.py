@@ -0,0 +1,152 @@
+"""Paddle controls: the Nunchuk or the touchscreen, behind one interface.
+
+Each control keeps the last state read from its device as a 6-byte
+``report``, which is all the game looks at and all a recording stores. Reads
+are split in two so the frame loop never waits on a device: ``request()`` asks
+for fresh state at the end of a frame, no more often than the control's
+interval, and ``poll()`` takes it in at the start of the next one. Asking
+several times before a ``poll()`` still reads the device once.
+
+The Nunchuk steps the paddle left and right with the joystick. Touch moves the
+paddle straight to the finger, so there is nothing to accelerate through.
+"""
+
+import struct
+
+from micropython import const
+from utime import ticks_ms, ticks_us, ticks_diff
+
+# Sources, as stored in recordings
+NUNCHUK = const(0)
+TOUCH = const(1)
+# Joystick reading with the stick centred
+CENTER = const(127)
+# How far the joystick must move from centre to count as input when idle
+_DEADZONE = const(40)
+# The Nunchuk needs this long between being asked for a report and sending it
+_READ_DELAY_MS = const(2)
+_TOUCH_REPORT = "<HB"
+
+
+class NunchukInput(object):
+    """NunchukInput."""
+
+    SOURCE = NUNCHUK
+
+    def __init__(self, nunchuk, interval_ms=8):
+        """Initialize Nunchuk control.
+
+        Args:
+            nunchuk: adafruit_nunchuk Nunchuk to read, or None for a control
+                only fed from a replay.
+            interval_ms (Optional int): Least time between reads.
+        """
+        self.nunchuk = nunchuk
+        self.interval_ms = interval_ms
+        # Stick centred, buttons released
+        self.report = bytearray((CENTER, CENTER, 0, 0, 0, 0x03))
+        self.requested_at = ticks_ms()
+        self.pending = False
+        # When the state in report was taken, in us
+        self.sampled_us = ticks_us()
+        self._requested_us = 0
+
+    def request(self):
+        """Ask the Nunchuk for its state, unless already asked or too soon."""
+        if self.pending or self.nunchuk is None:
+            return
+        now = ticks_ms()
+        if ticks_diff(now, self.requested_at) < self.interval_ms:
+            return
+        self.nunchuk.start_read()
+        self.requested_at = now
+        self._requested_us = ticks_us()
+        self.pending = True
+
+    def poll(self):
+        """Take in the state asked for by ``request`` once it is ready."""
+        if not self.pending or ticks_diff(ticks_ms(), self.requested_at) < _READ_DELAY_MS:
+            return
+        self.nunchuk.finish_read(self.report)
+        self.sampled_us = self._requested_us
+        self.pending = False
+
+    @property
+    def joystick_x(self):
+        return self.report[0]
+
+    @property
+    def target_x(self):
+        """The joystick has no absolute position."""
+        return None
+
+    @property
+    def pressed(self):
+        """Whether C, the start button, is held."""
+        return not self.report[5] & 0x02
+
+    @property
+    def active(self):
+        """Whether anything is being pressed or pushed."""
+        report = self.report
+        return (report[5] & 0x03 != 0x03 or abs(report[0] - 128) > _DEADZONE
+                or abs(report[1] - 128) > _DEADZONE)
+
+
+class TouchInput(object):
+    """TouchInput."""
+
+    SOURCE = TOUCH
+
+    def __init__(self, touch, scale=1, interval_ms=8):
+        """Initialize touch control.
+
+        Args:
+            touch: FT6236 to read, with nothing else polling it, or None for
+                a control only fed from a replay.
+            scale (Optional int): Display pixels per playfield pixel.
+            interval_ms (Optional int): Least time between reads.
+        """
+        self.touch = touch
+        self.scale = scale
+        self.interval_ms = interval_ms
+        self.report = bytearray(6)
+        self.polled_at = ticks_ms()
+        # When the state in report was taken, in us
+        self.sampled_us = ticks_us()
+
+    def request(self):
+        """Nothing to do, touch is read quickly enough in ``poll``."""
+
+    def poll(self):
+        """Read the first touch point, unless read too recently."""
+        if self.touch is None:
+            return
+        now = ticks_ms()
+        if ticks_diff(now, self.polled_at) < self.interval_ms:
+            return
+        self.polled_at = now
+        touch = self.touch
+        touch.poll()
+        self.sampled_us = ticks_us()
+        struct.pack_into(_TOUCH_REPORT, self.report, 0, touch.x // self.scale, touch.state)
+
+    @property
+    def joystick_x(self):
+        return CENTER
+
+    @property
+    def target_x(self):
+        """Playfield x under the finger, or None when not touched."""
+        if not self.report[2]:
+            return None
+        return self.report[0] | self.report[1] << 8
+
+    @property
+    def pressed(self):
+        """Whether the screen is touched, which starts a game."""
+        return bool(self.report[2])
+
+    @property
+    def active(self):
+        return bool(self.report[2])
@@ -0,0 +1,137 @@
+"""Frame descriptions, handed from the simulation to the renderer.
+
+The simulation never draws. After each frame's physics steps it describes
+what the renderer needs in a ``Frame``: where the balls and paddle are, which
+bricks were destroyed, the score and lives, and the sounds to play. The
+renderer draws from that alone.
+
+In dual-core mode the simulation runs on the second core and ``FrameBuffer``
+passes frames between the cores: the simulation fills the back frame while
+the renderer draws the front one, and they swap under a lock. A frame that
+cannot be handed over yet, because the renderer is still busy, keeps
+collecting the next frame's changes, so nothing is lost and the simulation
+never waits on the display except at the end of a level.
+"""
+
+import _thread
+from array import array
+
+from micropython import const
+
+# Things that happened during a frame, as bits of Frame.events
+EVENT_BOUNCE = const(1)
+EVENT_BRICK = const(2)
+EVENT_LIFE_LOST = const(4)
+EVENT_GAME_OVER = const(8)
+
+
+class Frame(object):
+    """Frame."""
+
+    def __init__(self, balls, bricks):
+        """Initialize frame.
+
+        Args:
+            balls (int): Most balls in play at once.
+            bricks (int): Most bricks in a level.
+        """
+        self.ball_count = 0
+        self.ball_x = array("h", bytes(2 * balls))
+        self.ball_y = array("h", bytes(2 * balls))
+        self.paddle_x = 0
+        # Bricks destroyed since the last frame drawn
+        self.cleared = array("H", bytes(2 * bricks))
+        self.cleared_count = 0
+        self.score = 0
+        self.lives = 0
+        self.events = 0
+        # The level has no bricks left, or the game ended
+        self.level_cleared = False
+        self.over = False
+
+    def reset(self):
+        """Forget the changes of a frame that has been drawn."""
+        self.cleared_count = 0
+        self.events = 0
+        self.level_cleared = False
+
+
+class FrameBuffer(object):
+    """FrameBuffer."""
+
+    def __init__(self, balls, bricks):
+        """Initialize frame buffer.
+
+        Args:
+            balls (int): Most balls in play at once.
+            bricks (int): Most bricks in a level.
+        """
+        self.frames = (Frame(balls, bricks), Frame(balls, bricks))
+        self.lock = _thread.allocate_lock()
+        # Index of the frame the simulation fills
+        self.back = 0
+        # The front frame holds a frame the renderer has not taken
+        self.ready = False
+        # The renderer is drawing the front frame
+        self.drawing = False
+        # The simulation waits for the renderer to load the next level
+        self.paused = False
+        # The renderer asked the simulation to stop early
+        self.stopping = False
+        # The simulation has stopped, with the exception that stopped it
+        self.done = False
+        self.error = None
+
+    def start(self):
+        """Reset for a new game."""
+        for frame in self.frames:
+            frame.reset()
+        self.back = 0
+        self.ready = self.drawing = self.paused = self.stopping = self.done = False
+        self.error = None
+
+    def back_frame(self):
+        """The frame the simulation should describe the next frame in."""
+        return self.frames[self.back]
+
+    def publish(self):
+        """Hand the back frame to the renderer.
+
+        Returns:
+            False if the renderer still has the last one, in which case keep
+            describing frames into the same back frame and try again.
+        """
+        with self.lock:
+            if self.ready or self.drawing:
+                return False
+            if self.frames[self.back].level_cleared:
+                self.paused = True
+            self.back ^= 1
+            self.ready = True
+            self.frames[self.back].reset()
+            return True
+
+    def take(self):
+        """Return the newest frame to draw, or None if there is none.
+
+        Call ``release`` once done with it.
+        """
+        with self.lock:
+            if not self.ready:
+                return None
+            self.ready = False
+            self.drawing = True
+            return self.frames[self.back ^ 1]
+
+    def release(self):
+        """Give a taken frame back once it has been drawn."""
+        with self.lock:
+            self.drawing = False
+
+    def resume(self):
+        """Let the simulation carry on after the next level is loaded."""
+        self.paused = False
+
+    def stop(self):
+        """Ask the simulation to stop, e.g. when the renderer fails."""
+        self.stopping = True
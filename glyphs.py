@@ -0,0 +1,160 @@
+"""Pre-rendered HUD text.
+
+Rasterizing text with the bitmap font is one of the slower things PicoGraphics
+does. ``GlyphCache`` renders the digits and fixed labels once into spritesheet
+tiles, so redrawing a number is one sprite per digit that changed.
+
+Glyph tiles are opaque over their own width and transparent past it, so a
+digit drawn next to another never paints over it.
+
+Without a spritesheet, ``TextDigits`` draws numbers the same way, a digit at a
+time with the bitmap font. Neither allocates to draw a number.
+"""
+
+from micropython import const
+
+from spritesheet import TILE
+
+# Marks a digit position as not drawn yet
+_UNKNOWN = const(0xFF)
+# Height of the bitmap8 font
+_CHAR_HEIGHT = const(8)
+# Each digit as a string, so drawing one needs no str()
+_DIGIT_TEXT = ("0", "1", "2", "3", "4", "5", "6", "7", "8", "9")
+
+
+def digit_slots(length):
+    """Return a buffer for ``number`` with nothing drawn yet."""
+    slots = bytearray(length)
+    for i in range(length):
+        slots[i] = _UNKNOWN
+    return slots
+
+
+def _text_width(display, text):
+    # Firmware returns the width, the type stubs a (width, height) tuple
+    width = display.measure_text(text, scale=1)
+    return width[0] if isinstance(width, tuple) else width
+
+
+class _Numbers(object):
+    """Draws numbers a digit at a time, only redrawing digits that change.
+
+    Subclasses set ``digits``, the id drawn for each digit, ``blank``, the
+    id of an empty position, and ``pitch``, and implement ``_draw``.
+    """
+
+    def number(self, value, x, y, shown, scale=1):
+        """Draw a non-negative number, left aligned.
+
+        Args:
+            value (int): Number to draw.
+            x, y (int): Top left position.
+            shown (bytearray): What is currently drawn at each digit
+                position, from ``digit_slots``, updated in place. Only positions whose tile changes are
+                drawn, and positions past the last digit are blanked.
+            scale (Optional int): Text scale.
+        """
+        digits = 1
+        divisor = 1
+        while value // divisor >= 10:
+            divisor *= 10
+            digits += 1
+        step = self.pitch * scale
+        for position in range(len(shown)):
+            if position < digits:
+                tile = self.digits[(value // divisor) % 10]
+                divisor //= 10
+            else:
+                tile = self.blank
+            if shown[position] != tile:
+                self._draw(x + position * step, y, tile, scale)
+                shown[position] = tile
+
+
+class GlyphCache(_Numbers):
+    """GlyphCache."""
+
+    def __init__(self, sheet, display, background, color, labels=()):
+        """Render the glyphs into the spritesheet.
+
+        Drawing uses the top left corner of the screen as scratch space, so
+        build the cache before drawing anything else.
+
+        Args:
+            sheet (SpriteSheet): Sheet to add the glyph tiles to.
+            display: Display to draw the glyphs on, playfield scaled if needed.
+            background: Pen behind the text.
+            color: Text pen. Must not be 0, which sprites treat as transparent.
+            labels (Optional tuple): Fixed strings to render.
+        """
+        self.sheet = sheet
+        self.display = display
+        self.background = background
+        self.color = color
+        screen = sheet.display
+        # Fixed advance per digit, so changing one never moves the others
+        self.pitch = _text_width(screen, "0")
+        self.blank = self._render("", self.pitch)
+        self.digits = bytearray(10)
+        for digit in range(10):
+            self.digits[digit] = self._render("0123456789"[digit], self.pitch)
+        self.labels = {}
+        for label in labels:
+            width = _text_width(screen, label)
+            self.labels[label] = (self._render(label, width), width)
+
+    def _render(self, text, width):
+        """Draw text on scratch space and capture it as a row of tiles."""
+        screen = self.sheet.display
+        count = (width + TILE - 1) // TILE
+        screen.set_pen(0)
+        screen.rectangle(0, 0, count * TILE, TILE)
+        screen.set_pen(self.background)
+        screen.rectangle(0, 0, width, TILE)
+        screen.set_pen(self.color)
+        if text:
+            screen.text(text, 0, 0, scale=1)
+        return self.sheet.capture(0, 0, count)
+
+    def label(self, text, x, y, scale=1):
+        """Draw a label given when the cache was built.
+
+        Returns:
+            Width drawn in px.
+        """
+        first, width = self.labels[text]
+        step = TILE * scale
+        for i in range((width + TILE - 1) // TILE):
+            self.display.sprite(x + i * step, y, first + i, scale)
+        return width * scale
+
+    def _draw(self, x, y, tile, scale):
+        self.display.sprite(x, y, tile, scale)
+
+
+class TextDigits(_Numbers):
+    """TextDigits."""
+
+    def __init__(self, display, background, color):
+        """Initialize text digits.
+
+        Args:
+            display: Display to draw on, playfield scaled if needed.
+            background: Pen behind the digits.
+            color: Digit pen.
+        """
+        self.display = display
+        self.background = background
+        self.color = color
+        self.pitch = _text_width(display, "0")
+        self.digits = bytes(range(10))
+        self.blank = 10
+
+    def _draw(self, x, y, digit, scale):
+        display = self.display
+        display.set_pen(self.background)
+        display.rectangle(x, y, self.pitch * scale, _CHAR_HEIGHT * scale)
+        if digit != self.blank:
+            display.set_pen(self.color)
+            display.text(_DIGIT_TEXT[digit], x, y, scale=scale)
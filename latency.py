@@ -0,0 +1,99 @@
+"""Input-to-display latency meter.
+
+The frame loop calls ``input()`` when a controller sample changes what the
+paddle is told to do, stamped with when the controller was read, and
+``frame()`` once each frame has been pushed to the display. The time from the
+sample to the end of the push that first shows it is kept for the last
+``samples`` changes in a preallocated ring buffer. ``dump()`` reports
+percentiles, over serial or to a file.
+
+What happens before the sample, the controller's own delay and the wait for
+the next read, is not visible on the board. ``python -m sim --latency``
+measures it end to end.
+"""
+
+from array import array
+
+from utime import ticks_us, ticks_diff
+
+
+def percentile(ordered, percent):
+    """Nearest-rank percentile of an already sorted sequence."""
+    if not ordered:
+        return 0
+    rank = (len(ordered) * percent + 99) // 100
+    return ordered[max(rank, 1) - 1]
+
+
+class LatencyMeter(object):
+    """LatencyMeter."""
+
+    def __init__(self, samples=256):
+        """Initialize latency meter.
+
+        Args:
+            samples (Optional int): Number of recent input changes to keep.
+        """
+        self.samples = samples
+        # Microseconds from sample to display, and the frame that showed it
+        self.latencies = array("l", [0] * samples)
+        self.tags = array("l", [0] * samples)
+        self.index = 0
+        self.count = 0
+        self.frames = 0
+        self.pending = None
+
+    def input(self, sampled_us):
+        """Note an input change, read from the controller at sampled_us.
+
+        A change that has not been shown yet is not replaced, since the
+        frame that shows the newer one shows it too.
+        """
+        if self.pending is None:
+            self.pending = sampled_us
+
+    def drop(self):
+        """Forget a change that will never be shown, e.g. at game over."""
+        self.pending = None
+
+    def frame(self):
+        """Note a frame has been pushed, showing any pending change."""
+        self.frames += 1
+        if self.pending is None:
+            return
+        self.latencies[self.index] = ticks_diff(ticks_us(), self.pending)
+        self.tags[self.index] = self.frames
+        self.pending = None
+        self.index = (self.index + 1) % self.samples
+        if self.count < self.samples:
+            self.count += 1
+
+    def ordered(self):
+        """Kept latencies in us, shortest first."""
+        return sorted(self.latencies[i] for i in range(self.count))
+
+    def summary(self):
+        """One line of latency percentiles in ms."""
+        ordered = self.ordered()
+        return "%d changes, ms p50 %.1f p90 %.1f p99 %.1f max %.1f" % (
+            len(ordered), percentile(ordered, 50) / 1000, percentile(ordered, 90) / 1000,
+            percentile(ordered, 99) / 1000, (ordered[-1] if ordered else 0) / 1000)
+
+    def dump(self, filename=None):
+        """Write the percentiles.
+
+        Args:
+            filename (Optional str): File to write to, along with each kept
+                change's frame and latency. Only the percentiles are printed
+                over serial if not given.
+        """
+        if filename is None:
+            print("input latency: " + self.summary())
+            return
+        first = (self.index - self.count) % self.samples
+        with open(filename, "w") as f:
+            f.write("input latency: " + self.summary() + "\n")
+            f.write("%8s %8s\n" % ("frame", "us"))
+            for i in range(self.count):
+                i = (first + i) % self.samples
+                f.write("%8d %8d\n" % (self.tags[i], self.latencies[i]))
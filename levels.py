@@ -0,0 +1,102 @@
+"""Level packs: many levels in one compact binary file.
+
+A pack is built on a PC with ``tools/build_levels.py`` and read a level at a
+time into buffers allocated once, so loading a level allocates almost
+nothing. The file is::
+
+    b"BRKL" version:u8 count:u8               header
+    left:u8 top:u8 columns:u8 rows:u8         per level, count times
+    column_step:u8 row_step:u8
+    width:u8 height:u8 colors:u8
+    r:u8 g:u8 b:u8                            colors times
+    cell:u8                                   columns * rows times, row by row
+
+A cell is the same byte ``BrickField`` stores: the low nibble is the brick's
+hit points (0 for no brick), the high nibble indexes the level's colours.
+"""
+
+import struct
+
+from micropython import const
+
+MAGIC = b"BRKL"
+VERSION = const(1)
+_LEVEL = "<9B"
+_LEVEL_SIZE = const(9)
+MAX_COLORS = const(16)
+
+
+class LevelPack(object):
+    """LevelPack."""
+
+    def __init__(self, filename, max_cells=256):
+        """Open a level pack.
+
+        Args:
+            filename (str): Pack to read.
+            max_cells (Optional int): Most cells a level may have.
+        """
+        self.file = open(filename, "rb")
+        header = self.file.read(6)
+        if len(header) != 6 or header[:4] != MAGIC or header[4] != VERSION or not header[5]:
+            self.file.close()
+            raise ValueError("not a Breakout level pack")
+        self.count = header[5]
+        self.header = bytearray(_LEVEL_SIZE)
+        self.rgb = bytearray(3 * MAX_COLORS)
+        self.cells = bytearray(max_cells)
+        # Level 1 starts right after the header, later ones are found by
+        # skipping the levels before them
+        self.next_level = 1
+        self.next_offset = 6
+        self.left = self.top = self.columns = self.rows = 0
+        self.column_step = self.row_step = self.width = self.height = 0
+        self.colors = 0
+
+    def _read_header(self):
+        if self.file.readinto(self.header) != _LEVEL_SIZE:
+            raise ValueError("level pack truncated")
+        (self.left, self.top, self.columns, self.rows, self.column_step,
+         self.row_step, self.width, self.height, self.colors) = struct.unpack(_LEVEL, self.header)
+        if self.colors > MAX_COLORS:
+            raise ValueError("level has too many colours")
+        if self.columns * self.rows > len(self.cells):
+            raise ValueError("level too large")
+
+    def load(self, level):
+        """Read a level into ``cells`` and the layout attributes.
+
+        Args:
+            level (int): Level number, from 1 to ``count``.
+
+        Returns:
+            memoryview of the level's cells.
+        """
+        if not 1 <= level <= self.count:
+            raise ValueError("no level %d" % level)
+        if level < self.next_level:
+            self.next_level = 1
+            self.next_offset = 6
+        self.file.seek(self.next_offset)
+        # Skip the levels in between without reading their cells
+        while self.next_level < level:
+            self._read_header()
+            self.file.seek(3 * self.colors + self.columns * self.rows, 1)
+            self.next_level += 1
+        self._read_header()
+        size = self.columns * self.rows
+        rgb = memoryview(self.rgb)[:3 * self.colors]
+        cells = memoryview(self.cells)[:size]
+        if self.file.readinto(rgb) != len(rgb) or self.file.readinto(cells) != size:
+            raise ValueError("level pack truncated")
+        self.next_level = level + 1
+        self.next_offset = self.file.tell()
+        return cells
+
+    def color(self, index):
+        """Return the (r, g, b) of one of the loaded level's colours."""
+        return self.rgb[3 * index], self.rgb[3 * index + 1], self.rgb[3 * index + 2]
+
+    def close(self):
+        """Close the pack file."""
+        self.file.close()
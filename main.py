@@ -1,110 +1,461 @@
 # All the game logic and classes are ported over from the breakout.py found in the cheungbx/gameESP-micropython github repo
 # https://github.com/cheungbx/gameESP-micropython/blob/master/breakout.py
 
+import _thread
+import asyncio
+import gc
 from machine import Pin, I2C
 from micropython import const
-from presto import Presto
+import my_presto
 import adafruit_nunchuk
+from compositor import Compositor
+from controls import NunchukInput, TouchInput, TOUCH
+from frames import (Frame, FrameBuffer, EVENT_BOUNCE, EVENT_BRICK,
+                    EVENT_LIFE_LOST, EVENT_GAME_OVER)
+from glyphs import GlyphCache, TextDigits, digit_slots
+from latency import LatencyMeter
+from levels import LevelPack, MAX_COLORS
+from palette import Palette
+from profiler import AllocationCounter, Profiler
+from playfield import Playfield, SIZE as PLAYFIELD_SIZE
+from replay import Recorder, Player, state_hash
+from scheduler import FixedStep
+from sound import SoundEngine, tune
+from spritesheet import SpriteSheet, TILE
+from array import array
 from math import sqrt
-from utime import ticks_ms, ticks_diff
+from utime import ticks_ms, ticks_us, ticks_diff, sleep_ms
 
+# Milliseconds since power on when the imports were done, for PROFILE's boot time
+boot_ticks = ticks_ms()
 
-class Ball(object):
-    """Ball."""
+try:
+    from ulab import numpy as np
+except ImportError:
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
 
-    def __init__(self, x, y, x_speed, y_speed, display, width=10, height=10,
-                 frozen=False):
-        self.x = x
-        self.y = y
-        self.x2 = x + width - 1
-        self.y2 = y + height - 1
-        self.prev_x = x
-        self.prev_y = y
+
+# Ball physics is integer only: positions and speeds are 8.8 fixed point
+FP_SHIFT = const(8)
+FP_HALF = const(1 << (FP_SHIFT - 1))
+# Times of impact are fractions of a move in 1/4096ths
+T_SHIFT = const(12)
+T_ONE = const(1 << T_SHIFT)
+_FAR = const(1 << 28)
+# Playfield edges the ball bounces off, in playfield pixels
+LEFT_WALL = const(3)
+RIGHT_WALL = const(240)
+TOP_WALL = const(30)
+# Most surfaces a ball can bounce off within one physics step
+MAX_CONTACTS = const(4)
+# Top ball speed in px per physics step
+BALL_MAX_SPEED = const(3)
+# Paddle bounce angles, indexed by how far off centre the ball hits
+PADDLE_ANGLES = const(40)
+# Largest index a ball can reach, hitting the edge of the narrowest paddle
+_PADDLE_ANGLE_RANGE = const(PADDLE_ANGLES * 5 // 4)
+
+
+def _paddle_bounce_table():
+    """Precompute 8.8 bounce speeds for each paddle hit offset.
+
+    Matches the original bounce: x speed is the hit offset as a fraction of
+    half the paddle times the top speed, y speed is whatever is left of the
+    top speed, but never less than 1 px per step.
+    """
+    xs = array("h", bytes(2 * (_PADDLE_ANGLE_RANGE + 1)))
+    ys = array("h", bytes(2 * (_PADDLE_ANGLE_RANGE + 1)))
+    for i in range(_PADDLE_ANGLE_RANGE + 1):
+        x_speed = i * BALL_MAX_SPEED / PADDLE_ANGLES
+        xs[i] = int(x_speed * (1 << FP_SHIFT))
+        ys[i] = -int(sqrt(max(1, BALL_MAX_SPEED ** 2 - x_speed ** 2)) * (1 << FP_SHIFT))
+    return xs, ys
+
+
+PADDLE_BOUNCE_X, PADDLE_BOUNCE_Y = _paddle_bounce_table()
+
+
+def sweep(x, y, width, height, dx, dy, box_x, box_y, box_width, box_height):
+    """Find when a box moving by dx, dy first touches a static box.
+
+    All arguments are 8.8 fixed point.
+
+    Returns:
+        ``t << 1 | axis``. t is the fraction of the move at first contact in
+        1/T_ONE, and is above T_ONE if they never touch. axis is 0 when a
+        vertical face is hit and 1 for a horizontal face.
+    """
+    if dx > 0:
+        x_entry = ((box_x - (x + width)) << T_SHIFT) // dx
+        x_exit = ((box_x + box_width - x) << T_SHIFT) // dx
+    elif dx < 0:
+        x_entry = ((box_x + box_width - x) << T_SHIFT) // dx
+        x_exit = ((box_x - (x + width)) << T_SHIFT) // dx
+    elif x + width <= box_x or x >= box_x + box_width:
+        return _FAR
+    else:
+        x_entry = -_FAR
+        x_exit = _FAR
+    if dy > 0:
+        y_entry = ((box_y - (y + height)) << T_SHIFT) // dy
+        y_exit = ((box_y + box_height - y) << T_SHIFT) // dy
+    elif dy < 0:
+        y_entry = ((box_y + box_height - y) << T_SHIFT) // dy
+        y_exit = ((box_y - (y + height)) << T_SHIFT) // dy
+    elif y + height <= box_y or y >= box_y + box_height:
+        return _FAR
+    else:
+        y_entry = -_FAR
+        y_exit = _FAR
+    if x_entry > y_entry:
+        if x_entry < 0 or x_entry > T_ONE or x_entry >= min(x_exit, y_exit):
+            return _FAR
+        return x_entry << 1
+    if y_entry < 0 or y_entry > T_ONE or y_entry >= min(x_exit, y_exit):
+        return _FAR
+    return y_entry << 1 | 1
+
+
+def _part(d, t):
+    """Move d scaled by t/T_ONE, rounded towards zero so it never overshoots."""
+    if d >= 0:
+        return (d * t) >> T_SHIFT
+    return -((-d * t) >> T_SHIFT)
+
+
+class BallStore(object):
+    """Every ball in play, stored as parallel arrays.
+
+    Ball ``i`` is ``fx[i], fy[i]`` (8.8 fixed point top left corner) moving
+    at ``x_speed[i], y_speed[i]`` per physics step. Balls are kept packed in
+    the first ``count`` slots, so removing one moves the last ball into its
+    place.
+
+    Balls in open space only need their speed added, which is done for all
+    of them at once with ulab/NumPy when available. The rest go through the
+    swept collision one at a time.
+
+    Physics never draws. ``describe`` copies the positions into a Frame and
+    ``draw`` draws from one, keeping its own record of where balls were
+    drawn so they can be erased.
+    """
+
+    def __init__(self, display, capacity, width=10, height=10):
+        """Initialize ball store.
+
+        Args:
+            display: presto display.
+            capacity (int): Most balls in play at once.
+            width, height (Optional int): Ball size.
+        """
+        self.display = display
+        self.capacity = capacity
         self.width = width
         self.height = height
         self.center = width // 2
-        self.max_x_speed = 3
-        self.max_y_speed = 3
-        self.frozen = frozen
-        self.display = display
-        self.x_speed = x_speed
-        self.y_speed = y_speed
-        self.x_speed2 = 0.0
-        self.y_speed2 = 0.0
-        self.created = ticks_ms()
-        self.color = display.create_pen(0, 0, 0)
-        self.background_color = display.create_pen(255, 255, 255)
+        self.count = 0
+        # Positions never go negative, so they fit 16 bits unsigned
+        self.fx = array("H", bytes(2 * capacity))
+        self.fy = array("H", bytes(2 * capacity))
+        self.x_speed = array("h", bytes(2 * capacity))
+        self.y_speed = array("h", bytes(2 * capacity))
+        # Pixel positions of the balls last drawn, and how many there were
+        self.prev_x = array("h", bytes(2 * capacity))
+        self.prev_y = array("h", bytes(2 * capacity))
+        self.drawn = 0
+        # Physics steps left stuck to the paddle, 0 once released
+        self.frozen_steps = array("h", bytes(2 * capacity))
+        # Set by the vector pass for balls already moved this step
+        self.moved = bytearray(capacity)
+        # Balls that bounced off something during the last update
+        self.bounced = 0
+        self.color = INK
+        self.background_color = DYNAMIC_BACKGROUND
+        # Tile drawn at scale 2 for each ball instead of a rectangle
+        self.sprite = BALL_SPRITE
+        if np is not None:
+            self.np_fx = np.frombuffer(self.fx, dtype=np.uint16)
+            self.np_fy = np.frombuffer(self.fy, dtype=np.uint16)
+            self.np_x_speed = np.frombuffer(self.x_speed, dtype=np.int16)
+            self.np_y_speed = np.frombuffer(self.y_speed, dtype=np.int16)
+            self.np_frozen_steps = np.frombuffer(self.frozen_steps, dtype=np.int16)
+            self.np_moved = np.frombuffer(self.moved, dtype=np.uint8)
+
+    def spawn(self, x, y, x_speed, y_speed, frozen=False):
+        """Add a ball.
+
+        Args:
+            x, y (int): Position in px.
+            x_speed, y_speed (int): Speed in px per physics step.
+            frozen (Optional bool): Hold the ball on the paddle for a while.
+
+        Returns:
+            False if the store is full.
+        """
+        i = self.count
+        if i == self.capacity:
+            return False
+        self.fx[i] = x << FP_SHIFT
+        self.fy[i] = y << FP_SHIFT
+        self.x_speed[i] = x_speed << FP_SHIFT
+        self.y_speed[i] = y_speed << FP_SHIFT
+        # Counted in physics steps, not ms, so replays stay deterministic
+        self.frozen_steps[i] = FROZEN_STEPS if frozen else 0
+        self.count = i + 1
+        return True
+
+    def remove(self, i):
+        """Remove a ball."""
+        last = self.count - 1
+        self.fx[i] = self.fx[last]
+        self.fy[i] = self.fy[last]
+        self.x_speed[i] = self.x_speed[last]
+        self.y_speed[i] = self.y_speed[last]
+        self.frozen_steps[i] = self.frozen_steps[last]
+        self.count = last
+
     def clear(self):
-        """Clear ball."""
-        self.display.set_pen(self.background_color)
-        display.rectangle(self.x, self.y, self.width, self.height)
+        """Remove every ball."""
+        self.count = 0
 
-    def clear_previous(self):
-        """Clear prevous ball position."""
-        self.display.set_pen(self.background_color)
-        display.rectangle(self.prev_x, self.prev_y, self.width, self.height)
+    def describe(self, frame):
+        """Put every ball's pixel position in a Frame."""
+        fx = self.fx
+        fy = self.fy
+        ball_x = frame.ball_x
+        ball_y = frame.ball_y
+        for i in range(self.count):
+            ball_x[i] = fx[i] >> FP_SHIFT
+            ball_y[i] = fy[i] >> FP_SHIFT
+        frame.ball_count = self.count
 
-    def draw(self):
-        """Draw ball."""
-        self.clear_previous()
-        self.display.set_pen(self.color)
-        display.rectangle(self.x, self.y, self.width, self.height)
-
-    def set_position(self, paddle_x, paddle_y, paddle_x2, paddle_center):
-        bounced = False
-        """Set ball position."""
-        self.prev_x = self.x
-        self.prev_y = self.y
-        # Check if frozen to paddle
-        if self.frozen:
-            # Freeze ball to top center of paddle
-            self.x = paddle_x + (paddle_center - self.center)
-            self.y = paddle_y - self.height
-            if ticks_diff(ticks_ms(), self.created) >= 2000:
-                # Release frozen ball after 2 seconds
-                self.frozen = False
+    def erase(self):
+        """Clear the balls last drawn from the screen."""
+        display = self.display
+        width = self.width
+        height = self.height
+        prev_x = self.prev_x
+        prev_y = self.prev_y
+        display.set_layer(DYNAMIC_LAYER)
+        display.set_pen(self.background_color)
+        for i in range(self.drawn):
+            display.rectangle(prev_x[i], prev_y[i], width, height)
+            compositor.damage(prev_x[i], prev_y[i], width, height)
+        display.set_layer(STATIC_LAYER)
+        self.drawn = 0
+
+    def draw(self, frame):
+        """Draw the balls in a Frame, erasing all old positions before drawing new ones."""
+        self.erase()
+        display = self.display
+        width = self.width
+        height = self.height
+        prev_x = self.prev_x
+        prev_y = self.prev_y
+        ball_x = frame.ball_x
+        ball_y = frame.ball_y
+        sprite = self.sprite
+        display.set_layer(DYNAMIC_LAYER)
+        display.set_pen(self.color)
+        for i in range(frame.ball_count):
+            x = ball_x[i]
+            y = ball_y[i]
+            if sprite is None:
+                display.rectangle(x, y, width, height)
             else:
-                return
-        self.x += int(self.x_speed) + int(self.x_speed2)
-        self.x_speed2 -= int(self.x_speed2)
-        self.x_speed2 += self.x_speed - int(self.x_speed)
-
-        self.y += int(self.y_speed) + int(self.y_speed2)
-        self.y_speed2 -= int(self.y_speed2)
-        self.y_speed2 += self.y_speed - int(self.y_speed)
-
-        far_right_wall = 240
-        # Bounces off walls
-        #Top bounce?
-        if self.y < 30:
-            # Bounce on top
-            self.y = 32
-            self.y_speed = -self.y_speed
-            bounced = True
-        if self.x + self.width >= far_right_wall:
-            self.x = far_right_wall - self.width
-            self.x_speed = -self.x_speed
-            bounced = True
-        elif self.x < 3:
-            self.x = 3
-            self.x_speed = -self.x_speed
-            bounced = True
-
-        # Check for collision with Paddle
-        if (self.y2 >= paddle_y and
-           self.x <= paddle_x2 and
-           self.x2 >= paddle_x):
-            # Ball bounces off paddle
-            self.y = paddle_y - (self.height + 1)
-            ratio = ((self.x + self.center) -
-                     (paddle_x + paddle_center)) / paddle_center
-            self.x_speed = ratio * self.max_x_speed
-            self.y_speed = -sqrt(max(1, self.max_y_speed ** 2 - self.x_speed ** 2))
-            bounced = True
+                display.sprite(x, y, sprite, 2)
+            compositor.damage(x, y, width, height)
+            prev_x[i] = x
+            prev_y[i] = y
+        self.drawn = frame.ball_count
+        display.set_layer(STATIC_LAYER)
+
+    def _paddle_bounce(self, i, paddle):
+        """Send a ball up at an angle set by where it hit the paddle."""
+        offset = (self.fx[i] + (self.center << FP_SHIFT)) - ((paddle.x + paddle.center) << FP_SHIFT)
+        index = min(_PADDLE_ANGLE_RANGE,
+                    (abs(offset) * PADDLE_ANGLES + FP_HALF) // (paddle.center << FP_SHIFT))
+        self.x_speed[i] = PADDLE_BOUNCE_X[index] if offset >= 0 else -PADDLE_BOUNCE_X[index]
+        self.y_speed[i] = PADDLE_BOUNCE_Y[index]
+
+    def _move_free(self, open_top, open_bottom):
+        """Move every ball that cannot touch anything this step, at once.
+
+        A ball is free if it is released and its whole move stays inside the
+        walls and between the bottom of the brick field and the paddle row.
+        """
+        n = self.count
+        fx = self.np_fx[:n]
+        fy = self.np_fy[:n]
+        x = fx + self.np_x_speed[:n]
+        y = fy + self.np_y_speed[:n]
+        free = ((self.np_frozen_steps[:n] == 0) &
+                (x >= LEFT_WALL << FP_SHIFT) &
+                (x + (self.width << FP_SHIFT) <= RIGHT_WALL << FP_SHIFT) &
+                (y >= open_top) & (fy >= open_top) &
+                (y + (self.height << FP_SHIFT) <= open_bottom) &
+                (fy + (self.height << FP_SHIFT) <= open_bottom))
+        fx[:] = np.where(free, x, fx)
+        fy[:] = np.where(free, y, fy)
+        self.np_moved[:n] = free
+
+    def update(self, paddle, bricks):
+        """Advance every ball by one physics step.
+
+        Each ball sweeps along its path and stops at the first wall, paddle
+        or brick it would touch, bounces, then carries on with the rest of
+        the step, so fast balls cannot tunnel through thin objects. Balls
+        that fall past the paddle are removed.
+
+        Returns:
+            Number of bricks destroyed.
+        """
+        width = self.width << FP_SHIFT
+        height = self.height << FP_SHIFT
+        paddle_x = paddle.x << FP_SHIFT
+        paddle_y = paddle.y << FP_SHIFT
+        paddle_width = paddle.width << FP_SHIFT
+        paddle_height = paddle.height << FP_SHIFT
+        brick_width = bricks.width << FP_SHIFT
+        brick_height = bricks.height << FP_SHIFT
+        # Band between the bricks and the paddle where nothing can be hit
+        open_top = (bricks.top + bricks.rows * bricks.row_step) << FP_SHIFT
+        open_bottom = paddle_y
+        left_wall = LEFT_WALL << FP_SHIFT
+        right_wall = RIGHT_WALL << FP_SHIFT
+        top_wall = TOP_WALL << FP_SHIFT
+        lost_y = (HEIGHT - 1 - self.height) << FP_SHIFT
+        fxs = self.fx
+        fys = self.fy
+        overlaps = bricks.found
+        x_speeds = self.x_speed
+        y_speeds = self.y_speed
+        frozen_steps = self.frozen_steps
+        moved = self.moved
+        vector = np is not None and self.count > 8
+        if vector:
+            self._move_free(open_top, open_bottom)
+        destroyed = 0
+        self.bounced = 0
+
+        # Backwards so lost balls can be removed in place
+        i = self.count
+        while i:
+            i -= 1
+            if vector and moved[i]:
+                continue
+            # Check if frozen to paddle
+            if frozen_steps[i]:
+                # Freeze ball to top center of paddle
+                fxs[i] = (paddle.x + paddle.center - self.center) << FP_SHIFT
+                fys[i] = paddle_y - height
+                # Release frozen ball after 2 seconds
+                frozen_steps[i] -= 1
+                continue
+            x = fxs[i]
+            y = fys[i]
+            dx = x_speeds[i]
+            dy = y_speeds[i]
+            # Nothing in reach, just move
+            if (x + dx >= left_wall and x + dx + width <= right_wall and
+                    min(y, y + dy) >= open_top and
+                    max(y, y + dy) + height <= open_bottom):
+                fxs[i] = x + dx
+                fys[i] = y + dy
+                continue
+
+            # The paddle moved into the ball
+            if (dy > 0 and
+                    y + height > paddle_y and y < paddle_y + paddle_height and
+                    x + width > paddle_x and x < paddle_x + paddle_width):
+                fys[i] = y = paddle_y - height
+                self._paddle_bounce(i, paddle)
+                self.bounced += 1
+
+            remaining = T_ONE
+            for _ in range(MAX_CONTACTS):
+                dx = _part(x_speeds[i], remaining)
+                dy = _part(y_speeds[i], remaining)
+                # Earliest contact so far as t << 1 | axis, a full move if none
+                best = T_ONE << 1
+                hit = None
+                # Bounces off walls
+                if dx < 0 and x + dx < left_wall:
+                    best = (((left_wall - x) << T_SHIFT) // dx) << 1
+                    hit = self
+                elif dx > 0 and x + width + dx > right_wall:
+                    best = (((right_wall - width - x) << T_SHIFT) // dx) << 1
+                    hit = self
+                #Top bounce?
+                if dy < 0 and y + dy < top_wall:
+                    t = (((top_wall - y) << T_SHIFT) // dy) << 1 | 1
+                    if t < best:
+                        best = t
+                        hit = self
+                # Check for collision with Paddle
+                t = sweep(x, y, width, height, dx, dy,
+                          paddle_x, paddle_y, paddle_width, paddle_height)
+                if t < best:
+                    best = t
+                    hit = paddle
+                # Check for hits with bricks in the swept area
+                brick = -1
+                if min(y, y + dy) < open_top:
+                    if profiler is not None:
+                        started = ticks_us()
+                    found = bricks.overlapping(min(x, x + dx) >> FP_SHIFT,
+                                               min(y, y + dy) >> FP_SHIFT,
+                                               (max(x, x + dx) + width) >> FP_SHIFT,
+                                               (max(y, y + dy) + height) >> FP_SHIFT)
+                    for k in range(found):
+                        index = overlaps[k]
+                        t = sweep(x, y, width, height, dx, dy,
+                                  bricks.x(index) << FP_SHIFT, bricks.y(index) << FP_SHIFT,
+                                  brick_width, brick_height)
+                        if t < best:
+                            best = t
+                            hit = bricks
+                            brick = index
+                    if profiler is not None:
+                        profiler.add(PHASE_BRICKS, ticks_diff(ticks_us(), started))
+                toi = best >> 1
+                x += _part(dx, toi)
+                y += _part(dy, toi)
+                if hit is None:
+                    break
+                remaining = (remaining * (T_ONE - toi)) >> T_SHIFT
+                self.bounced += 1
+                fxs[i] = x
+                if hit is paddle and best & 1:
+                    # Ball bounces off paddle
+                    self._paddle_bounce(i, paddle)
+                elif best & 1:
+                    y_speeds[i] = -y_speeds[i]
+                else:
+                    x_speeds[i] = -x_speeds[i]
+                if hit is bricks and bricks.hit(brick):
+                    destroyed += 1
+            fxs[i] = x
+            fys[i] = y
+
+            # Check for missed
+            if y > lost_y:
+                self.remove(i)
+        return destroyed
+
+    def hash_values(self, values):
+        """Append everything about the balls that affects play to values."""
+        values.append(self.count)
+        for i in range(self.count):
+            values.append(self.fx[i])
+            values.append(self.fy[i])
+            values.append(self.x_speed[i])
+            values.append(self.y_speed[i])
+            values.append(self.frozen_steps[i])
 
-        self.x2 = self.x + self.width - 1
-        self.y2 = self.y + self.height - 1
-        return bounced
 
 class Paddle(object):
     """Paddle."""
@@ -125,21 +476,50 @@ class Paddle(object):
         self.height = height
         self.center = width // 2
         self.display = display
-        self.paddle_color = display.create_pen(0, 0, 0)
-        self.background_color = display.create_pen(255, 255, 255)
-        self.display_width = 240
+        self.paddle_color = INK
+        self.background_color = DYNAMIC_BACKGROUND
+        self.display_width = WIDTH
+        self.drawn_x = None
         self.clear()
 
     def clear(self):
         """Clear paddle."""
-        self.display.set_pen(WHITE)
+        self.display.set_layer(DYNAMIC_LAYER)
+        self.display.set_pen(self.background_color)
         # Clears the whole bottom of the screen since the paddle can change in size
-        display.rectangle(0, self.y, 240, self.height)
+        self.display.rectangle(0, self.y, self.display_width, self.height)
+        self.display.set_layer(STATIC_LAYER)
+        compositor.damage(0, self.y, self.display_width, self.height)
+        self.drawn_x = None
 
-    def draw(self):
-        """Draw paddle."""
-        self.display.set_pen(BLACK)
-        display.rectangle(self.x, self.y, self.width, self.height)
+    def draw(self, x):
+        """Draw paddle at x, clearing whatever it uncovered since the last draw.
+
+        Args:
+            x (int): X coordinate, from a Frame.
+        """
+        prev_x = self.drawn_x
+        if prev_x == x:
+            return
+        self.display.set_layer(DYNAMIC_LAYER)
+        self.display.set_pen(self.paddle_color)
+        self.display.rectangle(x, self.y, self.width, self.height)
+        if prev_x is None:
+            compositor.damage(x, self.y, self.width, self.height)
+        else:
+            # Clear previous paddle
+            self.display.set_pen(self.background_color)
+            if x > prev_x:
+                self.display.rectangle(prev_x, self.y,
+                                       min(x - prev_x, self.width), self.height)
+                compositor.damage(prev_x, self.y, x + self.width - prev_x, self.height)
+            else:
+                left = max(x + self.width, prev_x)
+                self.display.rectangle(left, self.y,
+                                       prev_x + self.width - left, self.height)
+                compositor.damage(x, self.y, prev_x + self.width - x, self.height)
+        self.display.set_layer(STATIC_LAYER)
+        self.drawn_x = x
 
     def h_position(self, x):
         """Set paddle position.
@@ -147,109 +527,165 @@ class Paddle(object):
         Args:
             x (int):  X coordinate.
         """
-        new_x = max(0, min(x, self.display_width - self.width))
-        if new_x != self.x:  # Check if paddle moved
-            prev_x = self.x  # Store previous x position
-            self.x = new_x
-            self.x2 = self.x + self.width - 1
-            self.y2 = self.y + self.height - 1
-            self.draw()
-            # Clear previous paddle
-            self.display.set_pen(WHITE)
-            if x > prev_x:
-                display.rectangle(prev_x, self.y, x - prev_x, self.height)
-            else:
-                display.rectangle(prev_x + self.width, self.y, (prev_x + self.width) - (x + self.width), self.height)
-        else:
-            self.draw()
+        self.x = max(0, min(x, self.display_width - self.width))
+        self.x2 = self.x + self.width - 1
 
 
-class Brick(object):
-    """Brick."""
+class BrickField(object):
+    """Bricks stored as one byte per cell of a level's grid.
 
-    def __init__(self, x, y, color, display, width=20, height=5):
-        """Initialize brick.
+    The low nibble of a cell holds the brick's remaining hit points (0 means
+    no brick), the high nibble an index into ``colors``. Brick geometry is
+    computed from the cell position.
+
+    ``hit`` only notes destroyed bricks in ``cleared``, for the renderer to
+    clear with ``clear_cell``.
+    """
+
+    def __init__(self, display, columns, rows, left=20, top=30,
+                 column_step=25, row_step=10, width=20, height=5, cells=None):
+        """Initialize brick field.
 
         Args:
-            x, y (int):  X,Y coordinates.
-            color (string):  Blue, Green, Pink, Red or Yellow.
             display: presto display.
-            width (Optional int): Blick width
-            height (Optional int): Blick height
+            columns, rows (int): Grid size in cells.
+            left, top (Optional int): Position of the first brick.
+            column_step, row_step (Optional int): Cell pitch.
+            width, height (Optional int): Brick size.
+            cells (Optional bytes-like): Cells to use instead of an empty
+                grid, e.g. a level loaded from a level pack.
         """
-        self.x = x
-        self.y = y
-        self.x2 = x + width - 1
-        self.y2 = y + height - 1
-        self.center_x = x + (width // 2)
-        self.center_y = y + (height // 2)
-        self.color = color
+        self.display = display
+        self.columns = columns
+        self.rows = rows
+        self.left = left
+        self.top = top
+        self.column_step = column_step
+        self.row_step = row_step
         self.width = width
         self.height = height
-        self.display = display
-        self.background_color = display.create_pen(255, 255, 255)
-        self.draw()
+        self.colors = [BLACK] * 16
+        self.background_color = WHITE
+        # First tile of the textured row drawn for each colour instead of a
+        # rectangle, if set
+        self.sprites = None
+        # Filled by overlapping, so finding bricks allocates nothing
+        self.found = array("H", bytes(2 * columns * rows))
+        # Destroyed since the last Game.describe
+        self.cleared = array("H", bytes(2 * columns * rows))
+        self.cleared_count = 0
+        self.count = 0
+        if cells is None:
+            cells = bytearray(columns * rows)
+        else:
+            for cell in cells:
+                if cell & 0x0F:
+                    self.count += 1
+        self.cells = cells
 
-    def bounce(self, ball_x, ball_y, ball_x2, ball_y2,
-               x_speed, y_speed,
-               ball_center_x, ball_center_y):
-        """Determine bounce for ball collision with brick."""
-        x = self.x
-        y = self.y
-        x2 = self.x2
-        y2 = self.y2
-        center_x = self.center_x
-        center_y = self.center_y
-        if ((ball_center_x > center_x) and
-                (ball_center_y > center_y)):
-            if (ball_center_x - x2) < (ball_center_y - y2):
-                y_speed = -y_speed
-            elif (ball_center_x - x2) > (ball_center_y - y2):
-                x_speed = -x_speed
-            else:
-                x_speed = -x_speed
-                y_speed = -y_speed
-        elif ((ball_center_x > center_x) and
-              (ball_center_y < center_y)):
-            if (ball_center_x - x2) < -(ball_center_y - y):
-                y_speed = -y_speed
-            elif (ball_center_x - x2) > -(ball_center_y - y):
-                x_speed = -x_speed
-            else:
-                x_speed = -x_speed
-                y_speed = -y_speed
-        elif ((ball_center_x < center_x) and
-              (ball_center_y < center_y)):
-            if -(ball_center_x - x) < -(ball_center_y - y):
-                y_speed = -y_speed
-            elif -(ball_center_x - x) > -(ball_center_y - y):
-                y_speed = -y_speed
-            else:
-                x_speed = -x_speed
-                y_speed = -y_speed
-        elif ((ball_center_x < center_x) and
-              (ball_center_y > center_y)):
-            if -(ball_center_x - x) < (ball_center_y - y2):
-                y_speed = -y_speed
-            elif -(ball_center_x - x) > (ball_center_y - y2):
-                x_speed = -x_speed
-            else:
-                x_speed = -x_speed
-                y_speed = -y_speed
+    def fill(self, value):
+        """Put the same brick in every cell."""
+        for index in range(len(self.cells)):
+            self.cells[index] = value
+        self.count = len(self.cells) if value & 0x0F else 0
 
-        return [x_speed, y_speed]
+    def x(self, index):
+        """Left edge of the brick in a cell."""
+        return self.left + (index % self.columns) * self.column_step
 
-    def clear(self):
-        """Clear brick."""
+    def y(self, index):
+        """Top edge of the brick in a cell."""
+        return self.top + (index // self.columns) * self.row_step
+
+    def overlapping(self, x, y, x2, y2):
+        """Find every brick overlapping a bounding box.
+
+        Returns:
+            How many were found. Their indices are the start of ``found``.
+        """
+        found = self.found
+        count = 0
+        first_column = max(0, (x - self.left) // self.column_step)
+        last_column = min(self.columns - 1, (x2 - self.left) // self.column_step)
+        first_row = max(0, (y - self.top) // self.row_step)
+        last_row = min(self.rows - 1, (y2 - self.top) // self.row_step)
+        for row in range(first_row, last_row + 1):
+            brick_y = self.top + row * self.row_step
+            if y2 < brick_y or y > brick_y + self.height - 1:
+                continue
+            index = row * self.columns + first_column
+            for column in range(first_column, last_column + 1):
+                brick_x = self.left + column * self.column_step
+                if (self.cells[index] & 0x0F and
+                        x2 >= brick_x and
+                        x <= brick_x + self.width - 1):
+                    found[count] = index
+                    count += 1
+                index += 1
+        return count
+
+    def hit(self, index):
+        """Take a hit point off a brick.
+
+        Returns:
+            True if the brick was destroyed.
+        """
+        cell = self.cells[index] - 1
+        self.cells[index] = cell
+        if cell & 0x0F:
+            return False
+        self.cells[index] = 0
+        self.count -= 1
+        self.cleared[self.cleared_count] = index
+        self.cleared_count += 1
+        return True
+
+    def clear_cell(self, index):
+        """Clear the brick in a cell."""
+        x = self.x(index)
+        y = self.y(index)
         self.display.set_pen(self.background_color)
-        display.rectangle(self.x, self.y, self.width, self.height)
-        # self.display.fill_rect(self.x, self.y, self.width, self.height, 0)
+        self.display.rectangle(x, y, self.width, self.height)
+        compositor.damage(x, y, self.width, self.height)
 
     def draw(self):
-        """Draw brick."""
-        self.display.set_pen(self.color)
-        display.rectangle(self.x, self.y, self.width, self.height)
-        # self.display.rect(self.x, self.y, self.width, self.height, 1)
+        """Draw every brick."""
+        display = self.display
+        cells = self.cells
+        pen = None
+        sprites = self.sprites
+        tiles = (self.width + TILE - 1) // TILE
+        index = 0
+        for row in range(self.rows):
+            y = self.top + row * self.row_step
+            for column in range(self.columns):
+                cell = cells[index]
+                if cell & 0x0F and sprites is not None:
+                    x = self.left + column * self.column_step
+                    sprite = sprites[cell >> 4]
+                    for tile in range(tiles):
+                        display.sprite(x + tile * TILE, y, sprite + tile, 1)
+                elif cell & 0x0F:
+                    color = self.colors[cell >> 4]
+                    if color != pen:
+                        display.set_pen(color)
+                        pen = color
+                    display.rectangle(self.left + column * self.column_step, y,
+                                      self.width, self.height)
+                index += 1
+        compositor.damage(self.left, self.top,
+                          self.columns * self.column_step,
+                          self.rows * self.row_step)
+
+    def clear(self):
+        """Clear the whole field."""
+        self.display.set_pen(self.background_color)
+        self.display.rectangle(self.left, self.top,
+                               self.columns * self.column_step,
+                               self.rows * self.row_step)
+        compositor.damage(self.left, self.top,
+                          self.columns * self.column_step,
+                          self.rows * self.row_step)
 
 
 class Life(object):
@@ -270,19 +706,20 @@ class Life(object):
         self.y = 10
         self.width = width
         self.height = height
-        self.background_color = display.create_pen(255, 255, 255)
-        self.color = display.create_pen(0, 0, 0)
+        self.background_color = WHITE
+        self.color = BLACK
         self.draw()
 
     def clear(self):
         """Clear brick."""
         self.display.set_pen(self.background_color)
-        display.rectangle(self.x, self.y, self.width, self.height)
+        self.display.rectangle(self.x, self.y, self.width, self.height)
+        compositor.damage(self.x, self.y, self.width, self.height)
 
     def draw(self):
         """Draw brick."""
         self.display.set_pen(self.color)
-        display.rectangle(self.x, self.y, self.width, self.height)
+        self.display.rectangle(self.x, self.y, self.width, self.height)
 
 class Score(object):
     """Score."""
@@ -295,21 +732,24 @@ class Score(object):
         """
         margin = 40
         self.display = display
-        self.background_color = display.create_pen(255, 255, 255)
-        self.color = display.create_pen(0, 0, 0)
-        display.set_pen(self.color)
-        display.text("Score:", 160, 8, scale=2)
+        self.background_color = WHITE
+        self.color = BLACK
+        if glyphs is not None:
+            glyphs.label("Score:", 160, 8, scale=2)
+        else:
+            display.set_pen(self.color)
+            display.text("Score:", 160, 8, scale=2)
         self.x = 180 + margin
         self.y = 8
         self.value = 0
+        # Digits on screen, for only redrawing the ones that change
+        self.shown = digit_slots(3)
         self.draw()
 
     def draw(self):
         """Draw score value."""
-        self.display.set_pen(self.background_color)
-        display.rectangle(self.x, self.y, 25, 20)
-        self.display.set_pen(self.color)
-        display.text(str(self.value), self.x, self.y, scale=2)
+        numbers.number(self.value, self.x, self.y, self.shown, scale=2)
+        compositor.damage(self.x, self.y, WIDTH - self.x, 20)
 
     def game_over(self):
         """Display game_over."""
@@ -317,202 +757,845 @@ class Score(object):
         self.display.text("GAME OVER", 20, 170, scale=2)
         self.display.text("Press C to start", 20, 190)
 
-    def increment(self, points):
-        """Increase score by specified points."""
-        self.value += points
+    def show(self, value):
+        """Draw a new score value."""
+        self.value = value
         self.draw()
 
 def load_level(level, display, level_color):
-    level_bricks = []
-    # Sets the pen to white to clear previous level
-    display.set_pen(display.create_pen(255, 255, 255))
-    display.rectangle(40, 8, 80, 20)
-    # Sets the pen to black to write level
-    display.set_pen(display.create_pen(0, 0, 0))
-    display.text(f"Level: {level}", 40, 8, scale=2)
-
-    for row in range(30, 50 + 10 * level, 10):  # Start at row 30, increment by 10
-        for col in range(20, 220, 25):  # Start at column 20, increment by 25
-            level_bricks.append(Brick(col, row, level_color, display))
+    if glyphs is not None:
+        x = 40 + glyphs.label("Level: ", 40, 8, scale=2)
+        glyphs.number(level, x, 8, digit_slots(3), scale=2)
+    else:
+        # Sets the pen to white to clear previous level
+        display.set_pen(WHITE)
+        display.rectangle(40, 8, 80, 20)
+        # Sets the pen to black to write level
+        display.set_pen(BLACK)
+        display.text(f"Level: {level}", 40, 8, scale=2)
+    compositor.damage(40, 8, 80, 20)
+
+    if levels is not None:
+        cells = levels.load(level)
+        level_bricks = BrickField(display, levels.columns, levels.rows,
+                                  levels.left, levels.top,
+                                  levels.column_step, levels.row_step,
+                                  levels.width, levels.height, cells)
+        colors = [levels.color(index) for index in range(levels.colors)]
+        for index in range(len(colors)):
+            # Every level has its own colours, so they go in the same
+            # reserved pens each time rather than new ones
+            level_bricks.colors[index] = palette.recolor(index, *colors[index])
+    else:
+        # 8 columns from x=20 every 25px, rows from y=30 every 10px
+        level_bricks = BrickField(display, 8, 2 + level)
+        level_bricks.colors[0] = level_color
+        colors = (LEVEL_COLORS[(level - 1) % len(LEVEL_COLORS)],)
+        # Single hit bricks in colour 0
+        level_bricks.fill(0x01)
+    if BRICK_SPRITES is not None:
+        texture_bricks(level, level_bricks.width, level_bricks.height, colors)
+        level_bricks.sprites = BRICK_SPRITES
+    level_bricks.draw()
 
     return level_bricks
 
 
-# Setup for the Presto display
-presto = Presto()
-display = presto.display
-display.set_layer(0)
-display.set_font("bitmap8")
-WIDTH, HEIGHT = display.get_bounds()
+def _shade(color, amount):
+    """Lighten (amount > 0) or darken a colour, as a pen that is never 0."""
+    r, g, b = color
+    pen = palette.pen(max(0, min(255, r + amount)),
+                      max(0, min(255, g + amount)),
+                      max(0, min(255, b + amount)))
+    # Pen 0 is transparent in sprites
+    return pen or palette.pen(32, 32, 32)
 
-WHITE = display.create_pen(255, 255, 255)
-BLACK = display.create_pen(0, 0, 0)
 
-count = 0
-level = 1
-# level_color = display.create_pen(random.randint(0, 200), random.randint(0, 200), random.randint(0, 200))
-# level_color = display.create_pen(255, 0, 0)
+def texture_bricks(level, width, height, colors):
+    """Paint the brick tiles for a level: for each colour a bevelled block
+    with a pattern that changes from level to level."""
+    for index in range(len(colors)):
+        color = colors[index]
+        first = BRICK_SPRITES[index]
+        sheet.fill(first, 0, 0, BRICK_TILES * TILE, TILE, 0)
+        sheet.fill(first, 0, 0, width, height, _shade(color, 0))
+        # Light top and left edges, dark bottom and right ones
+        sheet.fill(first, 0, 0, width, 1, _shade(color, 70))
+        sheet.fill(first, 0, 0, 1, height, _shade(color, 70))
+        sheet.fill(first, 0, height - 1, width, 1, _shade(color, -90))
+        sheet.fill(first, width - 1, 1, 1, height - 1, _shade(color, -90))
+        pattern = _shade(color, -45)
+        if level % 3 == 2:
+            # Stripe along the middle
+            sheet.fill(first, 2, height // 2, width - 4, 1, pattern)
+        elif level % 3 == 0:
+            # Studs
+            for x in range(3, width - 2, 5):
+                sheet.fill(first, x, height // 2, 2, 1, pattern)
 
-i2c = I2C(0, scl=Pin(41), sda=Pin(40), freq=400_000)
-nc = adafruit_nunchuk.Nunchuk(i2c)
-prev_paddle_vect = 0
-MAX_LEVEL = const(5)
-BACKLIGHT_BRIGHTNESS = .50
 
-exitGame = False
-while not exitGame:
+class Game(object):
+    """State of one game, from the first level to game over.
 
-    paddle_width = 70
-    frameRate = 30
-    gameWon = False
-    gameOver = False
-    usePaddle = False
+    ``step`` and ``describe`` are the simulation and never draw, so they can
+    run on the second core. ``render``, ``play`` and ``next_level`` draw and
+    make sounds, from what ``describe`` put in a Frame.
+    """
 
+    def __init__(self, display, paddle_width=70):
+        """Initialize game.
 
-    while True:
-        display.set_pen(WHITE)
-        display.clear()
-        display.set_pen(BLACK)
-        display.text("BREAKOUT", 10, 10, scale=2)
-        display.text("Press C to start", 10, 30)
-        if nc.buttons.C:
-            break
-        presto.set_backlight(BACKLIGHT_BRIGHTNESS)
-        presto.update()
-
-    if not exitGame:
-        display.set_pen(WHITE)
-        display.clear()
-        level = 1
-        bricks = load_level(level, display, display.create_pen(level + 25, level + 25, level + 25))
-
+        Args:
+            display: presto display.
+            paddle_width (Optional int): Paddle width on the first level.
+        """
+        self.display = display
+        self.level = 1
+        self.paddle_width = paddle_width
+        self.over = False
+        self.won = False
+        # Set when the level has no bricks left, for the renderer to load the
+        # next one
+        self.level_cleared = False
+        self.points = 0
+        self.lives = 3
+        # EVENT_ bits since the last describe
+        self.events = 0
+        self.prev_paddle_vect = 0
+        self.bricks = load_level(self.level, display, palette.grey(self.level + 25))
         # Initialize paddle
-        paddle = Paddle(display, paddle_width, 10)
+        self.paddle = Paddle(display, paddle_width, 10)
         # Initialize score
-        score = Score(display)
-
+        self.score = Score(display)
         # Initialize balls
-        balls = []
+        self.balls = BallStore(display, MAX_BALLS)
         # Add first ball
-        balls.append(Ball(120, 120, -2, -1, display, frozen=True))
+        self.balls.spawn(120, 120, -2, -1, frozen=True)
+        # Extra balls to stress test multi-ball
+        for i in range(EXTRA_BALLS):
+            self.balls.spawn(20 + (i * 37) % 200, 100 + (i * 13) % 100,
+                             (i % 5) - 2 or 1, -1 - (i % 3))
         # Initialize lives
-        lives = []
-        for i in range(0, 3):
-            lives.append(Life(i, display))
-        prev_paddle_vect = 0
-        presto.set_backlight(BACKLIGHT_BRIGHTNESS)
-        presto.update()
+        self.life_icons = []
+        for i in range(0, self.lives):
+            self.life_icons.append(Life(i, display))
 
-        while not gameOver:
-            x, y = nc.joystick
+    def step(self, joystick_x, target_x=None):
+        """Advance paddle and balls by one fixed physics step.
 
+        Args:
+            joystick_x (int): Joystick reading, stepping the paddle.
+            target_x (Optional int): Where to centre the paddle instead, from
+                the touchscreen.
+        """
+        paddle = self.paddle
+        if target_x is not None:
+            paddle.h_position(target_x - paddle.center)
+            self.prev_paddle_vect = 0
+        else:
             paddle_vect = 0
-            if x < 127:
+            if joystick_x < 127:
                 paddle_vect = -1
-            elif x > 127:
+            elif joystick_x > 127:
                 paddle_vect = 1
-            if paddle_vect != prev_paddle_vect:
+            if paddle_vect != self.prev_paddle_vect:
                 paddle_vect *= 3
             else:
                 paddle_vect *= 5
             paddle.h_position(paddle.x + paddle_vect)
-            prev_paddle_vect = paddle_vect
-
-
-
-            # Handle balls
-            score_points = 0
-            for ball in balls:
-                #True it hits something
-                ball.set_position(paddle.x, paddle.y,paddle.x2, paddle.center)
-                # move ball and check if bounced off walls and paddle
-                # if ball.set_position(paddle.x, paddle.y, paddle.x2, paddle.center):
-                    #TODO add a buzzer beep here
-                    # g.playSound(900, 10)
-                # Check for collision with bricks if not frozen
-                if not ball.frozen:
-                    prior_collision = False
-                    ball_x = ball.x
-                    ball_y = ball.y
-                    ball_x2 = ball.x2
-                    ball_y2 = ball.y2
-                    ball_center_x = ball.x + ((ball.x2 + 1 - ball.x) // 2)
-                    ball_center_y = ball.y + ((ball.y2 + 1 - ball.y) // 2)
-
-                    # Check for hits
-                    for brick in bricks:
-                        if (ball_x2 >= brick.x and
-                                ball_x <= brick.x2 and
-                                ball_y2 >= brick.y and
-                                ball_y <= brick.y2):
-                            # Hit
-                            if not prior_collision:
-                                ball.x_speed, ball.y_speed = brick.bounce(
-                                    ball.x,
-                                    ball.y,
-                                    ball.x2,
-                                    ball.y2,
-                                    ball.x_speed,
-                                    ball.y_speed,
-                                    ball_center_x,
-                                    ball_center_y)
-                                # g.playTone('c6', 10)
-                                prior_collision = True
-                            score_points += 1
-                            brick.clear()
-                            bricks.remove(brick)
-
-                    # Check for missed
-                if ball.y2 > HEIGHT - 2:
-                    ball.clear_previous()
-                    balls.remove(ball)
-                    if not balls:
-                        # Lose life if last ball on screen
-                        if len(lives) == 0:
-                            score.game_over()
-                            while True:
-                                if nc.buttons.C:
-                                    break
-                                presto.update()
-                            # TODO add a buzzer beep here for lose
-                            # g.playTone('g4', 500)
-                            # g.playTone('c5', 200)
-                            # g.playTone('f4', 500)
-                            gameOver = True
-                        else:
-                            # Subtract Life
-                            lives.pop().clear()
-                            # Add ball
-                            balls.append(Ball(59, 58, 2, -3, display,
-                                              frozen=True))
-                else:
-                    # Draw ball
-                    ball.draw()
-                    # Update score if changed
-                if score_points:
-                    #TODO uncomment next line to test going to the next level by scoring once
-
-                    # bricks.clear()
-                    score.increment(score_points)
-                # Check for level completion
-                if not bricks:
-                    for ball in balls:
-                        ball.clear()
-                    balls.clear()
-                    level += 1
-                    #Make the paddle smaller with each level up
-                    paddle = Paddle(display, (paddle_width - (level * 5)), 10)
-                    paddle_width -= 2
-                    if level > MAX_LEVEL:
-                        level = 1
-                        score.game_over()
-                        display.text("You've won!", 20, 150)
-                        presto.update()
-                        while True:
-                            if nc.buttons.C:
-                                break
-                        gameOver = True
-                    bricks = load_level(level, display, display.create_pen(level + 25, level + 25, level + 25))
-                    balls.append(Ball(59, 58, -2, -1, display, frozen=True))
+            self.prev_paddle_vect = paddle_vect
+
+        # Handle balls
+        balls = self.balls
+        bricks = self.bricks
+        # move balls, bouncing off walls, paddle and bricks
+        destroyed = balls.update(paddle, bricks)
+        self.points += destroyed
+        if destroyed:
+            self.events |= EVENT_BRICK
+        elif balls.bounced:
+            self.events |= EVENT_BOUNCE
+
+        if not balls.count:
+            # Lose life if last ball on screen
+            if self.lives == 0:
+                self.events |= EVENT_GAME_OVER
+                self.over = True
+                return
+            # Subtract Life
+            self.events |= EVENT_LIFE_LOST
+            self.lives -= 1
+            # Add ball
+            balls.spawn(59, 58, 2, -3, frozen=True)
+
+        #TODO uncomment next line to test going to the next level by scoring once
+        # bricks.count = 0
+        # Check for level completion
+        if not bricks.count:
+            self.level_cleared = True
+
+    def describe(self, frame):
+        """Put everything the renderer needs to draw this frame in a Frame.
+
+        Destroyed bricks and events add to those already in the frame, so a
+        frame the renderer has not taken yet can be described again.
+        """
+        self.balls.describe(frame)
+        frame.paddle_x = self.paddle.x
+        bricks = self.bricks
+        cleared = frame.cleared
+        count = frame.cleared_count
+        for k in range(bricks.cleared_count):
+            cleared[count + k] = bricks.cleared[k]
+        frame.cleared_count = count + bricks.cleared_count
+        bricks.cleared_count = 0
+        frame.score = self.points
+        frame.lives = self.lives
+        frame.events |= self.events
+        self.events = 0
+        frame.level_cleared = self.level_cleared
+        frame.over = self.over
+
+    def next_level(self):
+        """Clear the playfield and load the next level.
+
+        Draws, so the simulation must be waiting while it runs.
+        """
+        self.balls.clear()
+        self.balls.erase()
+        self.level_cleared = False
+        self.level += 1
+        #Make the paddle smaller with each level up
+        self.paddle = Paddle(self.display,
+                             max(MIN_PADDLE_WIDTH, self.paddle_width - (self.level * 5)), 10)
+        self.paddle_width -= 2
+        if self.level > LAST_LEVEL:
+            if sound is not None:
+                sound.play(SOUND_WON, interrupt=True)
+            self.level = 1
+            self.won = True
+            self.over = True
+            return
+        level = self.level
+        if sound is not None:
+            sound.play(SOUND_LEVEL_UP, interrupt=True)
+        self.bricks = load_level(level, self.display, palette.grey(level + 25))
+        self.balls.spawn(59, 58, -2, -1, frozen=True)
+        compositor.invalidate()
+
+    def state_hash(self):
+        """Hash of everything that decides how the game plays out."""
+        values = [self.level, self.points, self.lives, self.paddle.x]
+        self.balls.hash_values(values)
+        return state_hash(values, self.bricks.cells)
+
+    def play(self, frame):
+        """Play the sounds for what happened in a Frame."""
+        if sound is None:
+            return
+        events = frame.events
+        if events & EVENT_BRICK:
+            sound.play(SOUND_BRICK)
+        elif events & EVENT_BOUNCE:
+            sound.play(SOUND_BOUNCE)
+        if events & EVENT_GAME_OVER:
+            sound.play(SOUND_GAME_OVER, interrupt=True)
+        elif events & EVENT_LIFE_LOST:
+            sound.play(SOUND_LIFE_LOST, interrupt=True)
+
+    def render(self, frame):
+        """Draw everything that changed in a Frame."""
+        bricks = self.bricks
+        cleared = frame.cleared
+        for k in range(frame.cleared_count):
+            bricks.clear_cell(cleared[k])
+        self.paddle.draw(frame.paddle_x)
+        self.balls.draw(frame)
+        life_icons = self.life_icons
+        while len(life_icons) > frame.lives:
+            life_icons.pop().clear()
+        # Update score if changed
+        if frame.score != self.score.value:
+            self.score.show(frame.score)
+
+
+# Levels played when there is no level pack
+MAX_LEVEL = const(5)
+# Paddles stop shrinking at this width on later levels
+MIN_PADDLE_WIDTH = const(30)
+# Bricks and HUD are drawn on the bottom layer only when they change
+STATIC_LAYER = const(0)
+# Pen 0 on an upper layer lets the layer below show through
+TRANSPARENT = const(0)
+# Physics steps per second, independent of how fast frames are drawn
+PHYSICS_RATE = const(30)
+# Most physics steps to catch up on after a long frame
+MAX_CATCHUP_STEPS = const(4)
+# Most balls in play at once
+MAX_BALLS = const(256)
+# Most bricks in a level, the most cells a level pack allows
+MAX_BRICKS = const(256)
+# How long a new ball sits on the paddle
+FROZEN_STEPS = const(2000 * PHYSICS_RATE // 1000)
+# How long before a frame is due to ask the controller for input, enough
+# for the Nunchuk to have its reading ready
+INPUT_LEAD_MS = const(3)
+# Buzzer on the Presto's expansion header
+BUZZER_PIN = const(43)
+# Frame phases timed by the profiler. Bricks is the brick collision part of
+# physics, so it is also counted in physics.
+PHASE_INPUT = const(0)
+PHASE_PHYSICS = const(1)
+PHASE_BRICKS = const(2)
+PHASE_DRAW = const(3)
+PHASE_PUSH = const(4)
+PHASES = ("input", "physics", "bricks", "draw", "push")
+PHASE_LABELS = ("in", "ph", "br", "dr", "pu")
+# Tiles across a brick sprite
+BRICK_TILES = const(3)
+# Brick colours in sprite mode, one per level
+LEVEL_COLORS = ((200, 60, 60), (230, 150, 40), (210, 200, 60),
+                (70, 170, 80), (60, 110, 210), (150, 80, 200))
+# Frames between profiler overlay redraws
+PROFILE_OVERLAY_FRAMES = const(15)
+
+# Settings below can be overridden from an optional config.py
+# Draw with an 8-bit palette instead of RGB565, halving framebuffer size and
+# the bytes pushed per update. The game only uses a handful of colours.
+USE_PALETTE = True
+# Use the display's native 480x480 resolution, drawing the playfield at
+# twice the size. Sharper, but each update pushes four times the pixels.
+FULL_RES = False
+# Draw with the RGB332 pen, which is what sprites need. Takes precedence
+# over USE_PALETTE, and pre-renders the HUD text into sprites.
+USE_SPRITES = False
+BACKLIGHT_BRIGHTNESS = .50
+# What moves the paddle: "nunchuk" on I2C, or "touch" to follow a finger on
+# the screen and start games with a tap, for cabinets without a controller
+CONTROL = "nunchuk"
+# Least time between controller reads. Reads happen at most once a frame.
+INPUT_POLL_MS = 8
+# Title and game over screens: how often to read the controller, how long
+# without input before dimming the backlight, and how far to dim it
+IDLE_POLL_MS = 50
+IDLE_DIM_MS = 30_000
+IDLE_BRIGHTNESS = .05
+# Balls added at the start of a game, for stress testing multi-ball
+EXTRA_BALLS = 0
+# Time each phase of every frame, show the averages along the top of the
+# screen and print a histogram at game over
+PROFILE = False
+# Write the histogram to this file instead of printing it
+PROFILE_FILE = None
+# Time how long each change of input takes to reach the display and print
+# percentiles at game over
+LATENCY = False
+# Write them to this file instead of printing them
+LATENCY_FILE = None
+# Count heap bytes allocated by the frame loop and print them at game over.
+# The loop should allocate nothing, so garbage collection only runs
+# between levels and on the title and game over screens. Leave PROFILE off,
+# its overlay text allocates.
+COUNT_ALLOCATIONS = False
+# Beep on bounces and play jingles through a buzzer on BUZZER_PIN
+SOUND = True
+# Level pack built with tools/build_levels.py. Without one the game plays
+# MAX_LEVEL levels of plain bricks.
+LEVEL_FILE = "levels.bin"
+# Run input and physics on the second core, leaving this one to draw and
+# push frames, so a slow push no longer holds up the simulation. PROFILE,
+# LATENCY and COUNT_ALLOCATIONS only time the single core loop.
+DUAL_CORE = False
+# Record the first game's input to this file
+RECORD_FILE = None
+# Play this recording back as fast as possible instead of reading the
+# controller, then check the game ended in the recorded state
+REPLAY_FILE = None
+try:
+    from config import *
+except ImportError:
+    pass
+
+# Setup for the Presto display
+# Full resolution only has memory for a single layer
+LAYERS = 1 if FULL_RES else 2
+# The game uses neither Wi-Fi nor touch, so skip bringing them up at boot and
+# skip the touch I2C read on every display update. Wi-Fi skipped at boot
+# cannot be used until the next boot
+presto = my_presto.Presto(full_res=FULL_RES, palette=USE_PALETTE and not USE_SPRITES,
+                          sprites=USE_SPRITES, layers=LAYERS,
+                          wifi=False, lazy_touch=True, auto_touch_poll=False)
+display = presto.display
+display.set_layer(STATIC_LAYER)
+display.set_font("bitmap8")
+# The game draws on a fixed size playfield scaled up to fit the display
+SCALE = display.get_bounds()[0] // PLAYFIELD_SIZE
+if SCALE > 1:
+    display = Playfield(display, SCALE)
+WIDTH, HEIGHT = display.get_bounds()
+compositor = Compositor(presto, WIDTH, HEIGHT, scale=SCALE)
+
+palette = Palette(display, indexed=USE_PALETTE and not USE_SPRITES)
+WHITE = palette.pen(255, 255, 255)
+BLACK = palette.pen(0, 0, 0)
+# The ball and paddle go on a layer of their own over the static one, where
+# erasing them just makes the pixels transparent again. Pure black is pen 0
+# in RGB565 and RGB332, so they are drawn in a black that is not.
+if LAYERS > 1:
+    DYNAMIC_LAYER = 1
+    DYNAMIC_BACKGROUND = TRANSPARENT
+else:
+    DYNAMIC_LAYER = STATIC_LAYER
+    DYNAMIC_BACKGROUND = WHITE
+INK = palette.pen(32, 32, 32)
+
+glyphs = None
+BALL_SPRITE = None
+BRICK_SPRITES = None
+if USE_SPRITES:
+    sheet = SpriteSheet(presto.display)
+    # Sprites treat pen 0 as transparent, so the text is in INK
+    glyphs = GlyphCache(sheet, display, WHITE, INK, labels=("Score:", "Level: "))
+    # A round ball drawn at scale 2, with a highlight
+    BALL_SPRITE = sheet.allocate(1)
+    sheet.fill(BALL_SPRITE, 1, 0, 3, 5, INK)
+    sheet.fill(BALL_SPRITE, 0, 1, 5, 3, INK)
+    sheet.fill(BALL_SPRITE, 1, 1, 1, 1, palette.grey(160))
+    # A row of tiles for each brick colour, repainted for each level by
+    # texture_bricks
+    BRICK_SPRITES = bytearray(MAX_COLORS)
+    for index in range(MAX_COLORS):
+        BRICK_SPRITES[index] = sheet.allocate(BRICK_TILES)
+    sheet.install()
+# Draws the score without allocating
+numbers = glyphs if glyphs is not None else TextDigits(display, WHITE, BLACK)
+
+
+def clear_screen():
+    """Clear every layer to the background."""
+    if DYNAMIC_LAYER != STATIC_LAYER:
+        display.set_layer(DYNAMIC_LAYER)
+        display.set_pen(TRANSPARENT)
+        display.clear()
+        display.set_layer(STATIC_LAYER)
+    display.set_pen(WHITE)
+    display.clear()
+
+
+# level_color = palette.pen(random.randint(0, 200), random.randint(0, 200), random.randint(0, 200))
+# level_color = palette.pen(255, 0, 0)
+
+# Fall back to the built-in levels without a usable pack
+levels = None
+LAST_LEVEL = MAX_LEVEL
+try:
+    levels = LevelPack(LEVEL_FILE)
+    LAST_LEVEL = levels.count
+except OSError:
+    pass
+except ValueError as e:
+    print("Ignoring %s: %s" % (LEVEL_FILE, e))
+if levels is not None:
+    palette.reserve(MAX_COLORS)
+
+
+def settings_hash():
+    """Hash of the settings that change how a game plays out, for recordings."""
+    h = state_hash((EXTRA_BALLS, LAST_LEVEL))
+    if levels is not None:
+        buffer = bytearray(256)
+        with open(LEVEL_FILE, "rb") as f:
+            count = f.readinto(buffer)
+            while count:
+                h = state_hash((), memoryview(buffer)[:count], h)
+                count = f.readinto(buffer)
+    return h
+
+
+player = None
+recorder = None
+replay_error = None
+if REPLAY_FILE:
+    # A replay needs no hardware, only a control of the recorded kind to feed
+    try:
+        player = Player(REPLAY_FILE, PHYSICS_RATE, settings_hash())
+    except (OSError, ValueError) as e:
+        replay_error = e
+    if player is not None and player.source == TOUCH:
+        control = TouchInput(None, SCALE)
+    else:
+        control = NunchukInput(None)
+elif CONTROL == "touch":
+    control = TouchInput(presto.touch, SCALE, INPUT_POLL_MS)
+else:
+    i2c = I2C(0, scl=Pin(41), sda=Pin(40), freq=400_000)
+    control = NunchukInput(adafruit_nunchuk.Nunchuk(i2c), INPUT_POLL_MS)
+if RECORD_FILE and not REPLAY_FILE:
+    # One recording per session, of the first game
+    recorder = Recorder(RECORD_FILE, PHYSICS_RATE, control.SOURCE, settings_hash())
+scheduler = FixedStep(PHYSICS_RATE, MAX_CATCHUP_STEPS)
+profiler = Profiler(PHASES) if PROFILE and not DUAL_CORE else None
+# Replayed input was not read from anything, so there is no latency to time
+latency = LatencyMeter() if LATENCY and not REPLAY_FILE and not DUAL_CORE else None
+allocations = AllocationCounter() if COUNT_ALLOCATIONS and not DUAL_CORE else None
+# Passes frames from the simulation on the second core to the renderer
+frames = FrameBuffer(MAX_BALLS, MAX_BRICKS) if DUAL_CORE else None
+
+sound = None
+if SOUND:
+    sound = SoundEngine(my_presto.Buzzer(BUZZER_PIN))
+    # Parsed once here so playing them costs nothing
+    SOUND_BOUNCE = tune("900:10")
+    SOUND_BRICK = tune("c6:10")
+    SOUND_LIFE_LOST = tune("e4:120 c4:250")
+    SOUND_GAME_OVER = tune("g4:500 c5:200 f4:500")
+    SOUND_LEVEL_UP = tune("c5:80 e5:80 g5:80 c6:200")
+    SOUND_WON = tune("c5:100 e5:100 g5:100 c6:150 g5:100 c6:400")
+
+
+def draw_profile():
+    """Show FPS and mean phase times in ms across the top of the screen."""
+    display.set_pen(WHITE)
+    display.rectangle(0, 0, WIDTH, 8)
+    display.set_pen(BLACK)
+    display.text(profiler.summary(PHASE_LABELS), 0, 0, scale=1)
+    compositor.damage(0, 0, WIDTH, 8)
+
+
+class Simulation(object):
+    """Input and physics for one game, a frame at a time.
+
+    Draws nothing, so it can run on either core. ``wait`` says how long to
+    sleep until the next frame is due, asking the controller for input just
+    before it, then ``advance`` runs the frame's physics steps and describes
+    them in a Frame.
+    """
+
+    def __init__(self, game, recorder=None):
+        """Initialize simulation.
+
+        Args:
+            game (Game): Game to simulate.
+            recorder (Optional Recorder): Where to record the game's input.
+        """
+        self.game = game
+        self.recorder = recorder
+        self.last_frame = ticks_ms()
+        self.last_x = control.joystick_x
+        self.last_target_x = control.target_x
+        # Physics steps the next frame runs, once it is due
+        self.steps = 0
+        # Set when a replay runs out of frames
+        self.ended = False
+
+    def wait(self):
+        """Return milliseconds to sleep before the next frame, 0 once it is due."""
+        if self.steps or self.ended:
+            return 0
+        if player is not None:
+            self.steps = player.frame(control.report)
+            if not self.steps:
+                self.ended = True
+                return 0
+            # Only pacing, instant on the simulator's virtual clock
+            return player.delta_ms
+        self.steps = scheduler.due()
+        if self.steps:
+            return 0
+        # Ask for input just before the frame, so it is fresh
+        wait = scheduler.remaining()
+        if wait > INPUT_LEAD_MS:
+            return wait - INPUT_LEAD_MS
+        control.request()
+        return wait
+
+    def advance(self, frame):
+        """Run the physics steps that are due and describe them in a Frame.
+
+        Stops early at the end of a level, which the renderer has to load
+        before play can go on.
+        """
+        game = self.game
+        steps = self.steps
+        self.steps = 0
+        if player is None:
+            # Controller state asked for just before this frame
+            control.poll()
+            now = ticks_ms()
+            if self.recorder is not None:
+                self.recorder.frame(ticks_diff(now, self.last_frame), steps, control.report)
+            self.last_frame = now
+        x = control.joystick_x
+        target_x = control.target_x
+        if latency is not None and (x != self.last_x or target_x != self.last_target_x):
+            latency.input(control.sampled_us)
+        self.last_x = x
+        self.last_target_x = target_x
+        if profiler is not None:
+            profiler.phase(PHASE_INPUT)
+        for _ in range(steps):
+            game.step(x, target_x)
+            if game.over or game.level_cleared:
+                break
+        game.describe(frame)
+
+    def finish(self):
+        """Ask for input straight away if running behind, with no wait to ask in."""
+        if not scheduler.remaining():
+            control.request()
+
+    def close(self):
+        """Finish the recording, if there is one, with the game's state.
+
+        Called however the game ends, so a recording cut short still
+        replays and verifies up to where it stopped.
+        """
+        if self.recorder is not None:
+            self.recorder.finish(self.game.state_hash())
+            self.recorder = None
+
+
+def simulate(simulation, frames):
+    """Run a game's input and physics on the second core.
+
+    Each frame is described in the back frame and handed to the renderer.
+    While the renderer is busy the next frames are described in the same back
+    frame instead. The end of a level, or of the game, waits until the
+    renderer has it, and after a level until the next one is loaded. Stops
+    early if the renderer calls ``frames.stop()``.
+    """
+    game = simulation.game
+    frame = frames.back_frame()
+    pending = False
+    try:
+        while not game.over and not frames.stopping:
+            wait = simulation.wait()
+            if wait:
+                sleep_ms(wait)
+                continue
+            if simulation.ended:
+                break
+            simulation.advance(frame)
+            pending = not frames.publish()
+            while pending and (game.over or game.level_cleared) and not frames.stopping:
+                sleep_ms(1)
+                pending = not frames.publish()
+            if not pending:
+                frame = frames.back_frame()
+            simulation.finish()
+            while frames.paused and not frames.stopping:
+                sleep_ms(1)
+        # The end of a replay
+        while pending and not frames.stopping and not frames.publish():
+            sleep_ms(1)
+    except Exception as e:
+        frames.error = e
+    # The recording is finished here, where the game state is changed
+    try:
+        simulation.close()
+    except Exception as e:
+        frames.error = e
+    frames.done = True
+
+
+async def play_here(game, simulation):
+    """Run a game's frames on this core, simulating then drawing each one."""
+    frame = Frame(MAX_BALLS, MAX_BRICKS)
+    try:
+        while not game.over:
+            wait = simulation.wait()
+            if wait:
+                await asyncio.sleep_ms(wait)
+                continue
+            if simulation.ended:
+                break
+            if allocations is not None:
+                allocations.start()
+            if profiler is not None:
+                profiler.start()
+            simulation.advance(frame)
+            if profiler is not None:
+                profiler.phase(PHASE_PHYSICS)
+            game.play(frame)
+            # Even the last frame, so the lost ball is erased and the final
+            # bricks and score are shown under GAME OVER
+            game.render(frame)
+            if frame.over:
+                break
+            level_cleared = frame.level_cleared
+            frame.reset()
+            if level_cleared:
+                game.next_level()
+            if profiler is not None:
+                profiler.phase(PHASE_DRAW)
+                if profiler.index % PROFILE_OVERLAY_FRAMES == 0:
+                    draw_profile()
+            # Push everything that changed this frame in one go
+            compositor.flush()
+            if latency is not None:
+                latency.frame()
+            simulation.finish()
+            if level_cleared:
+                # Loading a level allocates, so collect now while the
+                # ball waits on the paddle rather than mid-level
+                gc.collect()
+                scheduler.reset()
+            elif allocations is not None:
+                allocations.stop()
+            if profiler is not None:
+                profiler.phase(PHASE_PUSH)
+                profiler.end()
+            await asyncio.sleep_ms(0)
+    finally:
+        simulation.close()
+
+
+async def play_dual(game, simulation):
+    """Run a game's input and physics on the second core, drawing here."""
+    frames.start()
+    _thread.start_new_thread(simulate, (simulation, frames))
+    try:
+        while True:
+            # Checked first, so the last frame is not missed
+            done = frames.done
+            frame = frames.take()
+            if frame is None:
+                if done:
+                    break
+                await asyncio.sleep_ms(1)
+                continue
+            game.play(frame)
+            over = frame.over
+            level_cleared = frame.level_cleared
+            # Even the last frame, as in play_here
+            game.render(frame)
+            frames.release()
+            if over:
+                break
+            if level_cleared:
+                game.next_level()
+            # Push everything that changed this frame in one go
+            compositor.flush()
+            if level_cleared:
+                gc.collect()
+                scheduler.reset()
+                frames.resume()
+                if game.over:
+                    break
+            await asyncio.sleep_ms(0)
+    finally:
+        # Stops the second core too if this ended early on an exception
+        frames.stop()
+    # The game is only safe to touch once the second core is done with it
+    while not frames.done:
+        await asyncio.sleep_ms(1)
+    if frames.error is not None:
+        raise frames.error
+
+
+async def wait_for_start():
+    """Wait on a static screen until C is pressed.
+
+    The screen is already drawn, so nothing is pushed while waiting. The
+    control is polled slowly and the backlight dims when nothing has been
+    touched for a while, coming back as soon as anything is. C, or the
+    screen, has to be released first so a press from the previous screen
+    does not count.
+    """
+    presto.set_backlight(BACKLIGHT_BRIGHTNESS)
+    # Nothing is drawn while waiting, a good time to collect
+    gc.collect()
+    dimmed = False
+    released = False
+    last_input = ticks_ms()
+    while True:
+        control.request()
+        await asyncio.sleep_ms(IDLE_POLL_MS)
+        control.poll()
+        if control.pressed:
+            if released:
+                break
+        else:
+            released = True
+        if control.active:
+            last_input = ticks_ms()
+            if dimmed:
                 presto.set_backlight(BACKLIGHT_BRIGHTNESS)
-                presto.update()
+                dimmed = False
+        elif not dimmed and ticks_diff(ticks_ms(), last_input) > IDLE_DIM_MS:
+            presto.set_backlight(IDLE_BRIGHTNESS)
+            dimmed = True
+    presto.set_backlight(BACKLIGHT_BRIGHTNESS)
+
+
+async def main():
+    global boot_ticks, recorder
+    if sound is not None:
+        asyncio.create_task(sound.run())
+
+    exitGame = False
+    while not exitGame:
+
+        # A replay goes straight into the recorded game
+        if player is None:
+            clear_screen()
+            display.set_pen(BLACK)
+            display.text("BREAKOUT", 10, 10, scale=2)
+            display.text("Press C to start", 10, 30)
+            compositor.invalidate()
+            compositor.flush()
+            if PROFILE and boot_ticks is not None:
+                print("Boot: %d ms to first frame, %d ms of it after imports"
+                      % (ticks_ms(), ticks_diff(ticks_ms(), boot_ticks)))
+                boot_ticks = None
+            await wait_for_start()
+
+        if not exitGame:
+            clear_screen()
+            game = Game(display)
+            # Set once for the whole game, the frame loops leave it alone
+            presto.set_backlight(BACKLIGHT_BRIGHTNESS)
+            compositor.invalidate()
+            compositor.flush()
+            gc.collect()
+            scheduler.reset()
+            simulation = Simulation(game, recorder)
+            # Only the first game is recorded
+            recorder = None
+            if latency is not None:
+                latency.drop()
+            if DUAL_CORE:
+                await play_dual(game, simulation)
+            else:
+                await play_here(game, simulation)
+
+            final_hash = game.state_hash()
+            if profiler is not None:
+                profiler.dump(PROFILE_FILE)
+            if latency is not None:
+                latency.dump(LATENCY_FILE)
+            if allocations is not None:
+                print(allocations.summary())
+            if player is not None:
+                if player.verify(final_hash):
+                    result = "OK"
+                elif player.expected_hash is None:
+                    result = "recording incomplete"
+                else:
+                    result = "MISMATCH, recorded %08x" % player.expected_hash
+                print("Replayed %d frames, final state %08x: %s" % (player.frames, final_hash, result))
+                exitGame = True
+                continue
+
+            game.score.game_over()
+            if game.won:
+                display.text("You've won!", 20, 150)
+            compositor.invalidate()
+            compositor.flush()
+            await wait_for_start()
+
+
+if replay_error is not None:
+    print("Cannot replay %s: %s" % (REPLAY_FILE, replay_error))
+else:
+    asyncio.run(main())
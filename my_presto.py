@@ -15,6 +15,8 @@ Touch = namedtuple("touch", ("x", "y", "touched"))
 class Buzzer:
     def __init__(self, pin):
         self.pwm = PWM(Pin(pin))
+        self._duty = None
+        self._duty_u16 = 0
 
     def set_tone(self, freq, duty=0.5):
         if freq < 50.0:  # uh... https://github.com/micropython/micropython/blob/af64c2ddbd758ab6bac0fcca94c66d89046663be/ports/rp2/machine_pwm.c#L105-L119
@@ -22,7 +24,11 @@ class Buzzer:
             return False
 
         self.pwm.freq(freq)
-        self.pwm.duty_u16(int(65535 * duty))
+        # Only work the duty out when it changes, it allocates a float
+        if duty != self._duty:
+            self._duty = duty
+            self._duty_u16 = int(65535 * duty)
+        self.pwm.duty_u16(self._duty_u16)
         return True
 
 
@@ -30,13 +36,24 @@ class Presto():
     NUM_LEDS = 7
     LED_PIN = 33
 
-    def __init__(self, full_res=False, palette=False, ambient_light=False, direct_to_fb=False, layers=None, sprites=False):
-        # WiFi - *must* happen before Presto bringup
+    def __init__(self, full_res=False, palette=False, ambient_light=False, direct_to_fb=False, layers=None, sprites=False,
+                 wifi=True, lazy_touch=False, auto_touch_poll=True):
+        # wifi=False skips bringing up Wi-Fi, which then cannot be used at all, see below
+        # lazy_touch skips bringing up touch until it is first used
+        # auto_touch_poll=False stops update() and partial_update() polling touch, call touch_poll() instead
+        self._wifi = None
+        self._touch = None
+        self._full_res = full_res
+        self.auto_touch_poll = auto_touch_poll
+
+        # WiFi - *must* happen before Presto bringup, so it cannot be brought up later on demand
         # Note: Forces WiFi details to be in secrets.py
-        self.wifi = EzWiFi()
+        if wifi:
+            self._wifi = EzWiFi()
 
         # Touch Input
-        self.touch = FT6236(full_res=full_res)
+        if not lazy_touch:
+            self._touch = FT6236(full_res=full_res)
 
         # Display Driver & PicoGraphics
         if layers is None:
@@ -55,6 +72,18 @@ class Presto():
         if ambient_light:
             self.presto.auto_ambient_leds(True)
 
+    @property
+    def wifi(self):
+        if self._wifi is None:
+            raise RuntimeError("Wi-Fi was not brought up, pass wifi=True to use it")
+        return self._wifi
+
+    @property
+    def touch(self):
+        if self._touch is None:
+            self._touch = FT6236(full_res=self._full_res)
+        return self._touch
+
     @property
     def touch_a(self):
         return Touch(self.touch.x, self.touch.y, self.touch.state)
@@ -84,11 +113,13 @@ class Presto():
 
     def update(self):
         self.presto.update(self.display)
-        self.touch.poll()
+        if self.auto_touch_poll and self._touch is not None:
+            self._touch.poll()
 
     def partial_update(self, x, y, w, h):
         self.presto.partial_update(self.display, x, y, w, h)
-        self.touch.poll()
+        if self.auto_touch_poll and self._touch is not None:
+            self._touch.poll()
 
     def clear(self):
         self.display.clear()
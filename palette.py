@@ -0,0 +1,59 @@
+"""Shared pen registry.
+
+PicoGraphics hands out a new pen for every ``create_pen`` call, which in
+``PEN_P8`` mode uses up one of 256 palette slots each time. ``Palette`` interns
+pens by RGB so every colour is created once and shared.
+
+Colours that change over a session, like each level's bricks, would still
+fill the palette one level at a time. They go in a block of pens set aside
+once with ``reserve`` and repainted with ``recolor`` instead.
+"""
+
+
+class Palette(object):
+    """Palette."""
+
+    def __init__(self, display, indexed=False):
+        """Initialize palette.
+
+        Args:
+            display: presto display.
+            indexed (Optional bool): The display is in ``PEN_P8`` mode, where
+                pens are palette slots rather than colour values.
+        """
+        self.display = display
+        self.indexed = indexed
+        self.pens = {}
+        self.reserved = []
+
+    def pen(self, r, g, b):
+        """Return the pen for a colour, creating it on first use."""
+        key = (r << 16) | (g << 8) | b
+        pen = self.pens.get(key)
+        if pen is None:
+            pen = self.display.create_pen(r, g, b)
+            self.pens[key] = pen
+        return pen
+
+    def reserve(self, count):
+        """Set aside count pens for ``recolor``."""
+        if self.indexed:
+            for _ in range(count):
+                self.reserved.append(self.display.create_pen(0, 0, 0))
+
+    def recolor(self, index, r, g, b):
+        """Return reserved pen index, repainted to a colour.
+
+        Anything already drawn with the pen changes colour too. Without a
+        palette, pens are colour values and there is nothing to run out of,
+        so this is just the colour's pen.
+        """
+        if not self.indexed:
+            return self.display.create_pen(r, g, b)
+        pen = self.reserved[index]
+        self.display.update_pen(pen, r, g, b)
+        return pen
+
+    def grey(self, level):
+        """Return the pen for a grey level (0-255)."""
+        return self.pen(level, level, level)
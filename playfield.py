@@ -0,0 +1,55 @@
+"""Resolution independent drawing for the Presto display.
+
+The game is laid out on a 240x240 playfield. At full resolution the Presto
+display is 480x480, so ``Playfield`` stands in for the PicoGraphics display
+and scales every coordinate and size up before drawing. Anything it does not
+wrap, such as pens and fonts, goes straight to the display.
+"""
+
+from micropython import const
+
+SIZE = const(240)
+
+
+class Playfield(object):
+    """Playfield."""
+
+    def __init__(self, display, scale):
+        """Initialize playfield.
+
+        Args:
+            display: PicoGraphics display to draw on.
+            scale (int): Screen pixels per playfield pixel.
+        """
+        self.display = display
+        self.scale = scale
+        # Called every frame, bound once here rather than by __getattr__ on
+        # every call, which would allocate a bound method each time
+        self.set_pen = display.set_pen
+        self.set_layer = display.set_layer
+
+    def __getattr__(self, name):
+        return getattr(self.display, name)
+
+    def get_bounds(self):
+        """Return the playfield size."""
+        width, height = self.display.get_bounds()
+        return width // self.scale, height // self.scale
+
+    def rectangle(self, x, y, width, height):
+        """Draw a filled rectangle with the current pen."""
+        scale = self.scale
+        self.display.rectangle(x * scale, y * scale, width * scale, height * scale)
+
+    def text(self, text, x, y, scale=1):
+        """Draw text, scaled up along with the playfield."""
+        self.display.text(text, x * self.scale, y * self.scale, scale=scale * self.scale)
+
+    def sprite(self, x, y, sprite_index, scale=1):
+        """Draw a sprite, scaled up along with the playfield."""
+        self.display.sprite(x * self.scale, y * self.scale, sprite_index, scale * self.scale)
+
+    def pixel(self, x, y):
+        """Draw one playfield pixel with the current pen."""
+        scale = self.scale
+        self.display.rectangle(x * scale, y * scale, scale, scale)
@@ -23,8 +23,14 @@ class Presto:
         ambient_light: bool = False,
         direct_to_fb: bool = False,
         layers: Optional[int] = None,
+        sprites: bool = False,
+        wifi: bool = True,
+        lazy_touch: bool = False,
+        auto_touch_poll: bool = True,
     ) -> None: ...
 
+    auto_touch_poll: bool
+
     @property
     def touch_a(self) -> Touch: ...
     @property
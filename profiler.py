@@ -0,0 +1,187 @@
+"""Per-phase frame profiler.
+
+Each frame is split into phases timed with ``ticks_us``. The last ``frames``
+frames are kept in preallocated ring buffers, so profiling allocates nothing
+per frame apart from drawing the overlay. ``dump()`` prints a histogram of
+each phase, over serial or to a file.
+
+``AllocationCounter`` checks the frame loop does not allocate, using the
+MicroPython heap's byte count.
+"""
+
+from array import array
+
+from micropython import const
+from utime import ticks_us, ticks_diff
+
+try:
+    from gc import mem_alloc
+except ImportError:
+    # CPython, e.g. the simulator, has no heap byte count
+    mem_alloc = None
+
+# Histogram buckets are powers of two, from under 128 us to 16 ms and over
+_FIRST_BUCKET_SHIFT = const(7)
+_BUCKETS = const(9)
+_MAX_SAMPLE = const(0xFFFF)
+
+
+class Profiler(object):
+    """Profiler."""
+
+    def __init__(self, phases, frames=128):
+        """Initialize profiler.
+
+        Args:
+            phases (tuple): Phase names, in the order they are indexed.
+            frames (Optional int): Number of recent frames to keep.
+        """
+        self.phases = phases
+        self.frames = frames
+        # Microseconds per phase, one row of phases per frame
+        self.samples = array("H", bytes(2 * frames * len(phases)))
+        # Microseconds from the start of the previous frame to each frame
+        self.intervals = array("H", bytes(2 * frames))
+        self.current = array("l", [0] * len(phases))
+        self.index = 0
+        self.count = 0
+        self.frame_start = None
+        self.mark = 0
+
+    def start(self):
+        """Start timing a frame."""
+        now = ticks_us()
+        if self.frame_start is not None:
+            self.intervals[self.index] = min(_MAX_SAMPLE, ticks_diff(now, self.frame_start))
+        self.frame_start = now
+        self.mark = now
+
+    def phase(self, phase):
+        """End a phase, adding the time since the last mark to it."""
+        now = ticks_us()
+        self.current[phase] += ticks_diff(now, self.mark)
+        self.mark = now
+
+    def add(self, phase, us):
+        """Add time measured elsewhere to a phase."""
+        self.current[phase] += us
+
+    def end(self):
+        """Store the frame's phase times."""
+        phases = len(self.phases)
+        row = self.index * phases
+        for phase in range(phases):
+            self.samples[row + phase] = min(_MAX_SAMPLE, self.current[phase])
+            self.current[phase] = 0
+        self.index = (self.index + 1) % self.frames
+        if self.count < self.frames:
+            self.count += 1
+
+    def mean(self, phase):
+        """Mean time of a phase in us over the kept frames."""
+        if not self.count:
+            return 0
+        phases = len(self.phases)
+        total = 0
+        for frame in range(self.count):
+            total += self.samples[frame * phases + phase]
+        return total // self.count
+
+    def fps(self):
+        """Frames per second over the kept frames."""
+        frames = 0
+        total = 0
+        for frame in range(self.count):
+            interval = self.intervals[frame]
+            # The very first frame has nothing before it
+            if interval:
+                frames += 1
+                total += interval
+        if not total:
+            return 0
+        return frames * 1_000_000 // total
+
+    def summary(self, labels):
+        """One line of FPS and mean phase times in ms, for the overlay.
+
+        Args:
+            labels (tuple): Short label for each phase.
+        """
+        parts = ["%dfps" % self.fps()]
+        for phase in range(len(self.phases)):
+            mean = self.mean(phase)
+            parts.append("%s%d.%d" % (labels[phase], mean // 1000, mean % 1000 // 100))
+        return " ".join(parts)
+
+    def dump(self, filename=None):
+        """Write a histogram of every phase's times.
+
+        Args:
+            filename (Optional str): File to write to, printed over serial if
+                not given.
+        """
+        phases = len(self.phases)
+        lines = ["%d frames, %d fps" % (self.count, self.fps())]
+        header = "%-10s %7s %7s" % ("phase", "mean", "max")
+        for bucket in range(_BUCKETS):
+            header += " %6s" % ("<%d" % (1 << (_FIRST_BUCKET_SHIFT + bucket))
+                                if bucket < _BUCKETS - 1 else "more")
+        lines.append(header + "  (us)")
+        for phase in range(phases):
+            counts = [0] * _BUCKETS
+            longest = 0
+            for frame in range(self.count):
+                sample = self.samples[frame * phases + phase]
+                longest = max(longest, sample)
+                bucket = 0
+                while (bucket < _BUCKETS - 1 and
+                       sample >= 1 << (_FIRST_BUCKET_SHIFT + bucket)):
+                    bucket += 1
+                counts[bucket] += 1
+            line = "%-10s %7d %7d" % (self.phases[phase], self.mean(phase), longest)
+            for count in counts:
+                line += " %6d" % count
+            lines.append(line)
+        if filename is None:
+            for line in lines:
+                print(line)
+        else:
+            with open(filename, "w") as f:
+                for line in lines:
+                    f.write(line + "\n")
+
+
+class AllocationCounter(object):
+    """AllocationCounter."""
+
+    def __init__(self):
+        self.bytes = 0
+        self.frames = 0
+        # Frames that allocated anything, and the most one allocated
+        self.allocating = 0
+        self.worst = 0
+        self.mark = 0
+
+    def start(self):
+        """Start counting a frame."""
+        if mem_alloc is not None:
+            self.mark = mem_alloc()
+
+    def stop(self):
+        """Add what the frame allocated since ``start``."""
+        if mem_alloc is None:
+            return
+        allocated = mem_alloc() - self.mark
+        self.frames += 1
+        # A collection during the frame makes it negative, count it as none
+        if allocated > 0:
+            self.bytes += allocated
+            self.allocating += 1
+            self.worst = max(self.worst, allocated)
+
+    def summary(self):
+        """One line of how much the counted frames allocated."""
+        if mem_alloc is None:
+            return "allocations: no heap byte count on this platform"
+        return "allocations: %d bytes in %d of %d frames, at most %d in one" % (
+            self.bytes, self.allocating, self.frames, self.worst)
@@ -0,0 +1,164 @@
+"""Record a game's input and play it back deterministically.
+
+Game state only depends on the control's report and the number of physics
+steps taken each frame, so that is all a recording holds, plus how long the
+frame took for pacing. A recording is::
+
+    b"BRKR" version:u8 rate:u8        header, rate is the physics rate
+    source:u8                         which control, see controls.py
+    settings:u32                      hash of the settings that change play
+    delta_ms:u16 steps:u8 report:6s   one record per rendered frame
+    0:u16 0xFF:u8 hash:u32 pad:2      end marker with the final state hash
+
+Version 1 recordings have no source byte and are all Nunchuk, and versions 1
+and 2 have no settings hash, so they are replayed with whatever the game is
+set to. A recording cut off without its end marker, e.g. by a reset, plays
+up to its last whole frame but never verifies. Records are
+little endian. The file is written through a small buffer so the
+game loop does not hit the filesystem every frame.
+"""
+
+import struct
+
+from micropython import const
+
+MAGIC = b"BRKR"
+VERSION = const(3)
+_SETTINGS = "<I"
+_FRAME = "<HB6s"
+_FINISH = "<HBI2x"
+_FRAME_SIZE = const(9)
+_END = const(0xFF)
+_BUFFER_FRAMES = const(56)
+
+
+def state_hash(values, data=b"", seed=0x811C9DC5):
+    """32-bit FNV-1a hash of a sequence of small ints and a bytes-like."""
+    h = seed
+    for value in values:
+        for shift in (0, 8, 16, 24):
+            h = ((h ^ ((value >> shift) & 0xFF)) * 0x01000193) & 0xFFFFFFFF
+    for byte in data:
+        h = ((h ^ byte) * 0x01000193) & 0xFFFFFFFF
+    return h
+
+
+class Recorder(object):
+    """Recorder."""
+
+    def __init__(self, filename, rate, source=0, settings=0):
+        """Initialize recorder.
+
+        Args:
+            filename (str): Recording to create, replacing any existing one.
+            rate (int): Physics steps per second the game runs at.
+            source (Optional int): Control the reports come from.
+            settings (Optional int): Hash of the settings that change how
+                the game plays, which a replay must match.
+        """
+        self.file = open(filename, "wb")
+        self.file.write(MAGIC + bytes((VERSION, rate, source)))
+        self.file.write(struct.pack(_SETTINGS, settings))
+        self.buffer = bytearray(_FRAME_SIZE * _BUFFER_FRAMES)
+        self.used = 0
+
+    def frame(self, delta_ms, steps, report):
+        """Add one frame's clock delta, physics steps and 6-byte control report."""
+        struct.pack_into(_FRAME, self.buffer, self.used,
+                         min(delta_ms, 0xFFFF), steps, report)
+        self.used += _FRAME_SIZE
+        if self.used == len(self.buffer):
+            self.flush()
+
+    def flush(self):
+        """Write out buffered frames."""
+        self.file.write(memoryview(self.buffer)[:self.used])
+        self.used = 0
+
+    def finish(self, final_hash):
+        """Write the end marker and close the file."""
+        self.flush()
+        self.file.write(struct.pack(_FINISH, 0, _END, final_hash))
+        self.file.close()
+
+
+class Player(object):
+    """Player."""
+
+    def __init__(self, filename, rate, settings=0):
+        """Initialize player.
+
+        Args:
+            filename (str): Recording to play.
+            rate (int): Physics steps per second the game runs at, which
+                must match the recording.
+            settings (Optional int): Hash of the settings that change how
+                the game plays, which must match the recording's.
+
+        Raises:
+            OSError: The recording cannot be opened.
+            ValueError: It is empty, not a recording, or made with a
+                different rate or settings.
+        """
+        self.file = open(filename, "rb")
+        try:
+            self._read_header(rate, settings)
+        except ValueError:
+            self.file.close()
+            raise
+        self.buffer = bytearray(_FRAME_SIZE)
+        self.view = memoryview(self.buffer)
+        self.delta_ms = 0
+        self.frames = 0
+        self.expected_hash = None
+        self._skipped = bytearray(6)
+
+    def _read_header(self, rate, settings):
+        header = self.file.read(6)
+        if not header:
+            raise ValueError("recording is empty")
+        if len(header) < 6 or header[:4] != MAGIC or not 1 <= header[4] <= VERSION:
+            raise ValueError("not a Breakout recording")
+        version = header[4]
+        # Control the reports came from
+        source = self.file.read(1) if version > 1 else b"\x00"
+        recorded = self.file.read(4) if version > 2 else None
+        if not source or (recorded is not None and len(recorded) != 4):
+            raise ValueError("recording header truncated")
+        self.source = source[0]
+        if header[5] != rate:
+            raise ValueError("recorded at %d steps/s, game runs at %d" % (header[5], rate))
+        if recorded is not None and struct.unpack(_SETTINGS, recorded)[0] != settings:
+            raise ValueError("recorded with different settings, e.g. EXTRA_BALLS or the level pack")
+
+    def frame(self, report):
+        """Read the next frame, copying its control report into report.
+
+        Returns:
+            Physics steps to take, or 0 once the recording has ended. The
+            frame's clock delta is left in ``delta_ms``.
+        """
+        if self.expected_hash is not None or self.file.readinto(self.view) != _FRAME_SIZE:
+            return 0
+        buffer = self.buffer
+        # Unpacked by hand, struct would allocate a tuple every frame
+        self.delta_ms = buffer[0] | buffer[1] << 8
+        steps = buffer[2]
+        if steps == _END:
+            self.expected_hash = struct.unpack_from(_FINISH, buffer)[2]
+            self.file.close()
+            return 0
+        for i in range(6):
+            report[i] = buffer[3 + i]
+        self.frames += 1
+        return steps
+
+    def verify(self, final_hash):
+        """Return True if the replay ended in the recorded state.
+
+        A recording cut off before its end marker never verifies.
+        """
+        # The game can end before the last recorded frame is read
+        while self.expected_hash is None and self.frame(self._skipped):
+            pass
+        return final_hash == self.expected_hash
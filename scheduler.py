@@ -0,0 +1,47 @@
+"""Fixed-timestep frame pacing.
+
+Physics advances in fixed steps of ``1000 // rate`` milliseconds regardless of
+how long a frame takes to draw. When a frame runs long the next call to
+``due()`` reports several steps so the simulation catches up, bounded so a
+stall never turns into a burst of hundreds of steps.
+"""
+
+from utime import ticks_ms, ticks_diff, ticks_add
+
+
+class FixedStep(object):
+    """Fixed-timestep scheduler."""
+
+    def __init__(self, rate, max_steps=4):
+        """Initialize scheduler.
+
+        Args:
+            rate (int): Physics steps per second.
+            max_steps (Optional int): Most steps to catch up in one frame.
+        """
+        self.step_ms = 1000 // rate
+        self.max_steps = max_steps
+        self.next_tick = ticks_ms()
+
+    def reset(self):
+        """Forget any backlog, e.g. after a blocking screen."""
+        self.next_tick = ticks_ms()
+
+    def due(self):
+        """Return how many physics steps should run before the next render."""
+        now = ticks_ms()
+        behind = ticks_diff(now, self.next_tick)
+        if behind < 0:
+            return 0
+        steps = behind // self.step_ms + 1
+        if steps > self.max_steps:
+            # Too far behind to catch up, drop the backlog
+            steps = self.max_steps
+            self.next_tick = ticks_add(now, self.step_ms)
+        else:
+            self.next_tick = ticks_add(self.next_tick, steps * self.step_ms)
+        return steps
+
+    def remaining(self):
+        """Return milliseconds until the next step is due."""
+        return max(0, ticks_diff(self.next_tick, ticks_ms()))
@@ -0,0 +1,114 @@
+"""Headless host simulator for the Presto Breakout game.
+
+``install()`` registers stand-ins for the board-only modules (``machine``,
+``micropython``, ``utime``, ``_presto``, ``picographics``, ...) so ``main.py``
+runs unchanged under CPython. ``presto`` is the real ``my_presto.py`` driving
+the stand-in ``_presto``, so the display wrapper is exercised too.
+
+Run a benchmark with ``python -m sim``.
+"""
+
+import os
+import runpy
+import sys
+import time
+import types
+
+from .clock import SimulationComplete, VirtualClock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_STAND_INS = ("machine", "micropython", "utime", "_presto", "picographics",
+              "touch", "ezwifi", "backlight", "_thread")
+
+
+def install(until_ms=None, config=None):
+    """Register the stand-in modules and return the virtual clock.
+
+    Args:
+        until_ms (Optional int): Stop once the virtual clock passes this.
+        config (Optional dict): Settings to serve as the game's config.py.
+    """
+    from . import utime, uasyncio
+    clock = VirtualClock(until_ms)
+    utime.clock = clock
+    for name in _STAND_INS:
+        __import__(__name__ + "." + name)
+        sys.modules[name] = sys.modules[__name__ + "." + name]
+    sys.modules["time"] = utime
+    sys.modules["asyncio"] = uasyncio
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    # Game modules bind to the stand-ins, so load them fresh for every run
+    for name, module in list(sys.modules.items()):
+        path = getattr(module, "__file__", None)
+        if path and os.path.dirname(os.path.abspath(path)) == ROOT:
+            del sys.modules[name]
+    sys.modules.pop("config", None)
+    if config:
+        module = types.ModuleType("config")
+        module.__dict__.update(config)
+        sys.modules["config"] = module
+    import my_presto
+    sys.modules["presto"] = my_presto
+    return clock
+
+
+class Stats(object):
+    """What a simulated run did."""
+
+    def __init__(self, clock, driver, wall_s):
+        self.sim_ms = clock.ticks_ms()
+        self.wall_s = wall_s
+        self.frames = driver.frames
+        self.updates = driver.updates
+        self.partial_updates = driver.partial_updates
+        self.pixels_pushed = driver.pixels_pushed
+
+    def report(self):
+        """Return a human readable summary."""
+        wall = max(self.wall_s, 1e-9)
+        frames = max(self.frames, 1)
+        return "\n".join((
+            "simulated time:  %d ms" % self.sim_ms,
+            "wall time:       %.3f s" % self.wall_s,
+            "frames:          %d" % self.frames,
+            "host frames/sec: %.1f" % (self.frames / wall),
+            "sim frames/sec:  %.1f" % (self.frames * 1000 / max(self.sim_ms, 1)),
+            "full updates:    %d" % self.updates,
+            "partial updates: %d" % self.partial_updates,
+            "pixels/frame:    %.0f" % (self.pixels_pushed / frames),
+        ))
+
+
+def run(until_ms=10_000, stream=None, script="main.py", config=None):
+    """Run a script on the simulator until the virtual clock reaches until_ms.
+
+    Args:
+        until_ms (Optional int): Simulated milliseconds to run for, None to
+            run until the script returns.
+        stream (Optional): Nunchuk reports for ``machine.I2C.stream``.
+        script (Optional str): Script to run, relative to the repo root.
+        config (Optional dict): Settings to serve as the game's config.py.
+    """
+    clock = install(until_ms, config)
+    from . import _presto, machine
+    if stream is not None:
+        machine.I2C.stream = stream
+    drivers = []
+    real_init = _presto.Presto.__init__
+
+    def init(self, *args, **kwargs):
+        real_init(self, *args, **kwargs)
+        drivers.append(self)
+
+    _presto.Presto.__init__ = init
+    start = time.perf_counter()
+    try:
+        runpy.run_path(os.path.join(ROOT, script), run_name="__main__")
+    except SimulationComplete:
+        pass
+    finally:
+        clock.stop()
+        _presto.Presto.__init__ = real_init
+    return Stats(clock, drivers[0], time.perf_counter() - start)
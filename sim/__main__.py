@@ -0,0 +1,49 @@
+"""Benchmark the game headlessly.
+
+    python -m sim [--ms N] [--input FILE] [--record FILE]
+    python -m sim --replay FILE
+    python -m sim --set EXTRA_BALLS=200
+    python -m sim --latency
+"""
+
+import argparse
+import ast
+
+from . import run, latency
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m sim")
+    parser.add_argument("--ms", type=int, default=60_000,
+                        help="simulated milliseconds to run (default 60000)")
+    parser.add_argument("--input", help="file of raw 6-byte Nunchuk reports to replay")
+    parser.add_argument("--record", help="record each game's input to this file")
+    parser.add_argument("--replay", help="play a recording back and check its final state")
+    parser.add_argument("--latency", action="store_true",
+                        help="move the joystick on a schedule and report input to display latency")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE",
+                        help="override a setting in main.py, as config.py would")
+    args = parser.parse_args()
+    stream = None
+    if args.input:
+        with open(args.input, "rb") as f:
+            stream = f.read()
+    config = {}
+    for setting in args.set:
+        name, _, value = setting.partition("=")
+        config[name] = ast.literal_eval(value)
+    until_ms = args.ms
+    if args.record:
+        config["RECORD_FILE"] = args.record
+    if args.replay:
+        config["REPLAY_FILE"] = args.replay
+        until_ms = None
+    if args.latency:
+        stats, watcher = latency.measure(until_ms, config)
+        print(stats.report())
+        print(watcher.summary())
+        return
+    print(run(until_ms, stream, config=config).report())
+
+
+main()
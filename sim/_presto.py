@@ -0,0 +1,51 @@
+"""Stand-in for the ``_presto`` display driver.
+
+The driver object doubles as the framebuffer memory ``my_presto`` hands to
+PicoGraphics, and counts what each update would push over the bus.
+"""
+
+
+class Presto(bytearray):
+    """Presto."""
+
+    # Modelled cost of pushing one pixel to the panel
+    ns_per_pixel = 100
+
+    def __init__(self, full_res=False, palette=False):
+        size = 480 if full_res else 240
+        super().__init__(size * size * (1 if palette else 2))
+        self.full_res = full_res
+        self.backlight = 1.0
+        self.updates = 0
+        self.partial_updates = 0
+        self.pixels_pushed = 0
+        # Pushes back to back with no time passing in between are one frame
+        self.frames = 0
+        self._last_push_us = None
+
+    def _pushed(self, pixels):
+        from . import utime
+        clock = utime.clock
+        self.pixels_pushed += pixels
+        if clock.us != self._last_push_us:
+            self.frames += 1
+        # Pushes block the CPU on the board, so they take virtual time
+        clock.advance_us(pixels * self.ns_per_pixel // 1000)
+        self._last_push_us = clock.us
+
+    def update(self, display):
+        self.updates += 1
+        self._pushed(display.width * display.height)
+
+    def partial_update(self, display, x, y, w, h):
+        self.partial_updates += 1
+        self._pushed(w * h)
+
+    def set_backlight(self, brightness):
+        self.backlight = brightness
+
+    def auto_ambient_leds(self, enable):
+        pass
+
+    def set_led_rgb(self, index, r, g, b):
+        pass
@@ -0,0 +1,29 @@
+"""Stand-in for MicroPython's ``_thread``, with a host thread as the second core.
+
+Threads are tracked on the virtual clock so a run can stop them when it
+ends, and hold it while they are busy. Anything not modelled here falls through to the host ``_thread``.
+"""
+
+import _thread as _host_thread
+import threading
+
+from . import utime
+
+
+def start_new_thread(function, args):
+    clock = utime.clock
+
+    def run():
+        clock.hold()
+        try:
+            function(*args)
+        finally:
+            clock.release()
+
+    thread = threading.Thread(target=run, daemon=True)
+    clock.threads.append(thread)
+    thread.start()
+
+
+def __getattr__(name):
+    return getattr(_host_thread, name)
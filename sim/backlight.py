@@ -0,0 +1,8 @@
+"""Stand-in for the ``backlight`` module."""
+
+
+class Reactive(object):
+    """Reactive."""
+
+    def __init__(self, *args, **kwargs):
+        pass
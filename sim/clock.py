@@ -0,0 +1,104 @@
+"""Virtual clock shared by the ``utime``/``time`` and ``asyncio`` stand-ins.
+
+Time only moves when the game sleeps, so the game loop runs as fast as the
+host CPU allows while still seeing the timing it would on the board.
+
+A thread standing in for the second core sleeps alongside the coroutines on
+the first. Either side holds the clock while it is busy, so neither runs
+ahead of the other. Drawing takes no virtual time,
+so the simulator checks that the cores work together but cannot show how
+much faster they are than one.
+"""
+
+import _thread
+import time as _host_time
+
+
+class SimulationComplete(Exception):
+    """Raised from a sleep once the clock passes its deadline."""
+
+
+class VirtualClock(object):
+    """Millisecond clock advanced by sleeps instead of wall time."""
+
+    def __init__(self, until_ms=None):
+        """Initialize clock.
+
+        Args:
+            until_ms (Optional int): Stop the simulation once time passes this.
+        """
+        self.us = 0
+        self.until_ms = until_ms
+        # Wake times of coroutines parked in asyncio.sleep_ms, and of threads
+        # in sleep_thread_us
+        self.sleepers = []
+        # The game's own thread, threads it started, and whether the run is
+        # over and they should stop
+        self.main_thread = _thread.get_ident()
+        self.threads = []
+        self.stopped = False
+        self._lock = _thread.allocate_lock()
+        # Time each busy thread holds the clock at, by thread
+        self._holds = {}
+        # Whether the game's own thread is parked in asyncio.sleep_ms, rather
+        # than busy, which holds the clock for other threads
+        self.main_idle = False
+
+    def ticks_ms(self):
+        return self.us // 1000
+
+    def ticks_us(self):
+        return self.us
+
+    def advance_us(self, us):
+        """Move time forward."""
+        if us <= 0:
+            return
+        with self._lock:
+            self.us += us
+        if self.until_ms is not None and self.us // 1000 > self.until_ms:
+            raise SimulationComplete()
+
+    def advance_ms(self, ms):
+        self.advance_us(int(ms * 1000))
+
+    def sleep_thread_us(self, us):
+        """Block a thread other than the game's own until time has moved on.
+
+        The thread waits its turn with the other sleepers, moving the clock
+        itself if it is the first due.
+        """
+        held = _thread.get_ident() in self._holds
+        if held:
+            self.release()
+        wake = self.us + max(0, int(us))
+        sleepers = self.sleepers
+        sleepers.append(wake)
+        try:
+            while self.us < wake:
+                if self.stopped:
+                    raise SimulationComplete()
+                if self.main_idle and wake == min(sleepers):
+                    self.advance_us(wake - self.us)
+                    return
+                # Let the other thread run
+                _host_time.sleep(0)
+        finally:
+            sleepers.remove(wake)
+            if held:
+                self.hold()
+
+    def hold(self):
+        """Keep sleepers from moving the clock while this thread is busy."""
+        self._holds[_thread.get_ident()] = self.us
+        self.sleepers.append(self.us)
+
+    def release(self):
+        """Let the clock move again, once this thread is done or asleep."""
+        self.sleepers.remove(self._holds.pop(_thread.get_ident()))
+
+    def stop(self):
+        """End the run, waiting for the threads it started to stop."""
+        self.stopped = True
+        for thread in self.threads:
+            thread.join()
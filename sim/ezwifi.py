@@ -0,0 +1,11 @@
+"""Stand-in for ``ezwifi``; the simulator never connects."""
+
+
+class EzWiFi(object):
+    """EzWiFi."""
+
+    def __init__(self, **kwargs):
+        pass
+
+    async def connect(self, ssid=None, password=None):
+        return False
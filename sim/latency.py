@@ -0,0 +1,141 @@
+"""End-to-end input latency on the simulator.
+
+The joystick is pushed left or right at known times, pausing centred in
+between, and every push to the panel is watched for the bottom row of the
+paddle changing. The time from moving the joystick to the end of the push that
+first shows the paddle move is the latency a player feels: it includes
+waiting for the next controller read, the read itself, the frame and every
+update pushed before the paddle's.
+
+The game's own ``LatencyMeter`` runs alongside and prints the part it can
+see, from controller read to display, at each game over.
+"""
+
+from . import _presto, machine, run, utime
+
+# Joystick pattern: centred, then pushed one way, then centred, then the other
+# way, so the paddle never gets stuck against a wall
+_CENTERED_MS = (230, 410, 170, 350, 290)
+_PUSHED_MS = 250
+# A move not shown within this long is counted as missed, e.g. on a menu
+_TIMEOUT_MS = 1000
+# Tap C this often to get through the title and game over screens
+_START_EVERY_MS = 5000
+_START_MS = 100
+
+
+class Schedule(object):
+    """When the joystick moves, and where to."""
+
+    def __init__(self, until_ms):
+        self.moves = []
+        now = 500
+        direction = 0
+        while now < until_ms:
+            now += _CENTERED_MS[len(self.moves) % len(_CENTERED_MS)]
+            self.moves.append((now, direction))
+            now += _PUSHED_MS
+            direction ^= 1
+
+    def __call__(self, now_ms):
+        x = 127
+        for start, direction in self.moves:
+            if start > now_ms:
+                break
+            if now_ms < start + _PUSHED_MS:
+                x = 255 if direction else 0
+        return machine.nunchuk_report(x=x, c=now_ms % _START_EVERY_MS < _START_MS)
+
+
+class Watcher(object):
+    """Watches pushes for the paddle moving after each joystick move."""
+
+    def __init__(self, moves):
+        self.moves = moves
+        self.next_move = 0
+        self.move_us = None
+        self.baseline = None
+        self.shown = None
+        self.latencies = []
+        self.missed = 0
+
+    def _row(self, display):
+        # Bottom row of the paddle on the layer it is drawn on
+        y = display.height - 1
+        framebuffer = display.framebuffer[display.layers - 1]
+        if hasattr(framebuffer, "ndim"):
+            return framebuffer[y].tobytes()
+        return framebuffer[y * display.width:(y + 1) * display.width].tobytes()
+
+    def pushed(self, display, start_us, end_us, whole=False):
+        """Account for a push that ran from start_us to end_us.
+
+        A whole screen push, like a new game or level, redraws the paddle
+        whether it moved or not, so it cannot show a move.
+        """
+        if self.move_us is not None and start_us - self.move_us > _TIMEOUT_MS * 1000:
+            self.missed += 1
+            self.move_us = None
+        moves = self.moves
+        while self.move_us is None and self.next_move < len(moves):
+            move_us = moves[self.next_move][0] * 1000
+            if start_us < move_us:
+                break
+            self.next_move += 1
+            if start_us - move_us > _TIMEOUT_MS * 1000:
+                # Nothing near the paddle was pushed since, e.g. on a menu
+                self.missed += 1
+                continue
+            # The panel shows what the last push left there
+            self.move_us = move_us
+            self.baseline = self.shown
+        self.shown = self._row(display)
+        if self.move_us is not None and whole:
+            self.missed += 1
+            self.move_us = None
+        if self.move_us is not None and self.shown != self.baseline:
+            self.latencies.append(end_us - self.move_us)
+            self.move_us = None
+
+    def summary(self):
+        # The game's modules only import once the stand-ins are installed
+        from latency import percentile
+        ordered = sorted(self.latencies)
+        return ("end to end: %d moves, %d missed, ms p50 %.1f p90 %.1f p99 %.1f max %.1f" % (
+            len(ordered), self.missed, percentile(ordered, 50) / 1000,
+            percentile(ordered, 90) / 1000, percentile(ordered, 99) / 1000,
+            (ordered[-1] if ordered else 0) / 1000))
+
+
+def measure(until_ms=60_000, config=None):
+    """Run the game with scripted joystick moves and time each one.
+
+    Returns:
+        The run's Stats and the Watcher holding the latencies.
+    """
+    schedule = Schedule(until_ms)
+    watcher = Watcher(schedule.moves)
+    config = dict(config or {})
+    config["LATENCY"] = True
+    real_update = _presto.Presto.update
+    real_partial_update = _presto.Presto.partial_update
+
+    def update(self, display):
+        start = utime.clock.ticks_us()
+        real_update(self, display)
+        watcher.pushed(display, start, utime.clock.ticks_us(), whole=True)
+
+    def partial_update(self, display, x, y, w, h):
+        start = utime.clock.ticks_us()
+        real_partial_update(self, display, x, y, w, h)
+        if y + h >= display.height:
+            watcher.pushed(display, start, utime.clock.ticks_us())
+
+    _presto.Presto.update = update
+    _presto.Presto.partial_update = partial_update
+    try:
+        stats = run(until_ms, schedule, config=config)
+    finally:
+        _presto.Presto.update = real_update
+        _presto.Presto.partial_update = real_partial_update
+    return stats, watcher
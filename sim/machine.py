@@ -0,0 +1,98 @@
+"""Stand-in for MicroPython's ``machine`` module.
+
+``I2C`` plays back Nunchuk reports instead of talking to a bus. Each read
+returns the next report from ``I2C.stream``: 6-byte Nunchuk reports back to
+back, or a callable that builds one from a time in ms. Like the Nunchuk, which
+takes its reading when asked for one, that is the time of the last write.
+"""
+
+from . import utime
+
+
+def nunchuk_report(x=127, y=127, c=False, z=False, ax=512, ay=512, az=512):
+    """Build the 6-byte report a Nunchuk returns for the given state."""
+    buttons = (0 if c else 0x02) | (0 if z else 0x01)
+    return bytes((
+        x, y, ax >> 2, ay >> 2, az >> 2,
+        ((az & 0x03) << 6) | ((ay & 0x03) << 4) | ((ax & 0x03) << 2) | buttons,
+    ))
+
+
+def demo_stream(now_ms):
+    """Default input: sweep the joystick and tap C every few seconds."""
+    phase = (now_ms // 1500) % 4
+    x = (0, 127, 255, 127)[phase]
+    return nunchuk_report(x=x, c=(now_ms % 3000) < 100)
+
+
+class Pin(object):
+    """Pin."""
+
+    OUT = 1
+    IN = 0
+
+    def __init__(self, pin, *args, **kwargs):
+        self.pin = pin
+        self._value = 0
+
+    def value(self, value=None):
+        if value is None:
+            return self._value
+        self._value = value
+
+
+class I2C(object):
+    """I2C bus replaying Nunchuk reports."""
+
+    stream = demo_stream
+
+    def __init__(self, bus, scl=None, sda=None, freq=400_000):
+        self.bus = bus
+        self.freq = freq
+        self.reads = 0
+        self.writes = 0
+        self._offset = 0
+        self._written_ms = None
+
+    def _transfer(self, length):
+        # Address byte plus payload, 9 clocks per byte, blocking like the board
+        utime.clock.advance_us((length + 1) * 9 * 1_000_000 // self.freq)
+
+    def writeto(self, address, data):
+        self.writes += 1
+        self._written_ms = utime.ticks_ms()
+        self._transfer(len(data))
+
+    def readfrom_into(self, address, buffer):
+        self.reads += 1
+        self._transfer(len(buffer))
+        stream = I2C.stream
+        if callable(stream):
+            now = utime.ticks_ms()
+            report = stream(now if self._written_ms is None else self._written_ms)
+        else:
+            if self._offset + 6 > len(stream):
+                # Hold the last report once the recording runs out
+                self._offset = max(0, len(stream) - 6)
+            report = stream[self._offset:self._offset + 6]
+            self._offset += 6
+        buffer[:len(report)] = report
+
+
+class PWM(object):
+    """PWM."""
+
+    def __init__(self, pin):
+        self.pin = pin
+        self._freq = 0
+        self._duty = 0
+
+    def freq(self, value=None):
+        if value is None:
+            return self._freq
+        self._freq = value
+
+    def duty_u16(self, value=None):
+        if value is None:
+            return self._duty
+        self._duty = value
@@ -0,0 +1,197 @@
+"""Stand-in for ``picographics`` with an in-memory framebuffer.
+
+Each layer is a ``height x width`` array of pen values: 16-bit RGB565 colours,
+or 8-bit RGB332 colours or palette indices depending on the pen type. NumPy
+backs the framebuffer when it is installed, otherwise a flat ``array``. Text
+is drawn as solid character cells; glyph shapes are not modelled. Sprites are
+blitted from the 128x128 spritesheet of 8x8 tiles, with colour 0 transparent.
+"""
+
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+DISPLAY_PRESTO = 0
+DISPLAY_PRESTO_FULL_RES = 1
+
+PEN_RGB565 = 0
+PEN_P8 = 1
+PEN_RGB332 = 2
+
+_SIZES = {
+    DISPLAY_PRESTO: (240, 240),
+    DISPLAY_PRESTO_FULL_RES: (480, 480),
+}
+
+# bitmap8 character cell
+_CHAR_WIDTH = 6
+_CHAR_HEIGHT = 8
+
+_SHEET_SIZE = 128
+_TILE = 8
+
+
+class PicoGraphics(object):
+    """PicoGraphics."""
+
+    def __init__(self, display, buffer=None, layers=1, pen_type=PEN_RGB565):
+        self.width, self.height = _SIZES[display]
+        self.pen_type = pen_type
+        self.layers = layers
+        wide = pen_type == PEN_RGB565
+        if numpy is not None:
+            self.framebuffer = numpy.zeros((layers, self.height, self.width),
+                                           dtype=numpy.uint16 if wide else numpy.uint8)
+        else:
+            self.framebuffer = [array("H" if wide else "B",
+                                      bytes((2 if wide else 1) * self.width * self.height))
+                                for _ in range(layers)]
+        self.layer = 0
+        self.pen = 0
+        self.palette = []
+        self.clip = (0, 0, self.width, self.height)
+        self.spritesheet = None
+        self.font = "bitmap8"
+        self.calls = 0
+
+    # Pen
+
+    def create_pen(self, r, g, b):
+        self.calls += 1
+        if self.pen_type == PEN_P8:
+            if len(self.palette) == 256:
+                raise RuntimeError("palette full")
+            self.palette.append((r, g, b))
+            return len(self.palette) - 1
+        if self.pen_type == PEN_RGB332:
+            return (r & 0xE0) | ((g & 0xE0) >> 3) | (b >> 6)
+        return ((r & 0xF8) << 8) | ((g & 0xFC) << 3) | (b >> 3)
+
+    def update_pen(self, pen, r, g, b):
+        if self.pen_type == PEN_P8:
+            self.palette[pen] = (r, g, b)
+
+    def set_palette(self, palette):
+        self.palette = list(palette)
+
+    def set_pen(self, pen):
+        self.calls += 1
+        self.pen = pen
+
+    def set_thickness(self, thickness):
+        pass
+
+    # Primitives
+
+    def set_layer(self, layer):
+        self.layer = layer
+
+    def set_clip(self, x, y, w, h):
+        self.clip = (max(0, x), max(0, y), min(self.width, x + w), min(self.height, y + h))
+
+    def remove_clip(self):
+        self.clip = (0, 0, self.width, self.height)
+
+    def set_font(self, font):
+        self.font = font
+
+    def get_bounds(self):
+        return self.width, self.height
+
+    def clear(self):
+        self.calls += 1
+        cx, cy, cx2, cy2 = self.clip
+        self._fill(cx, cy, cx2 - cx, cy2 - cy)
+
+    def pixel(self, x, y):
+        self.calls += 1
+        self._fill(x, y, 1, 1)
+
+    def pixel_span(self, x, y, length):
+        self.calls += 1
+        self._fill(x, y, length, 1)
+
+    def rectangle(self, x, y, w, h):
+        self.calls += 1
+        self._fill(x, y, w, h)
+
+    def circle(self, x, y, r):
+        self.calls += 1
+        self._fill(x - r, y - r, 2 * r + 1, 2 * r + 1)
+
+    def measure_text(self, text, scale=1):
+        return len(text) * _CHAR_WIDTH * scale, _CHAR_HEIGHT * scale
+
+    def character(self, x, y, char, scale=1, angle=0):
+        self.calls += 1
+        self._fill(x, y, (_CHAR_WIDTH - 1) * scale, (_CHAR_HEIGHT - 1) * scale)
+
+    def text(self, text, x, y, wrap=0, scale=1, angle=0):
+        self.calls += 1
+        for i, char in enumerate(text):
+            if char != " ":
+                self._fill(x + i * _CHAR_WIDTH * scale, y,
+                           (_CHAR_WIDTH - 1) * scale, (_CHAR_HEIGHT - 1) * scale)
+
+    def line(self, x1, y1, x2, y2):
+        self.calls += 1
+        self._fill(min(x1, x2), min(y1, y2), abs(x2 - x1) + 1, abs(y2 - y1) + 1)
+
+    # Sprites
+
+    def set_spritesheet(self, spritedata):
+        self.spritesheet = spritedata
+
+    def load_spritesheet(self, filename):
+        with open(filename, "rb") as f:
+            self.spritesheet = bytearray(f.read())
+
+    def sprite(self, x, y, sprite_index, scale=1, angle=0):
+        self.calls += 1
+        sheet = self.spritesheet
+        if sheet is None:
+            return
+        pen = self.pen
+        left = (sprite_index % (_SHEET_SIZE // _TILE)) * _TILE
+        top = (sprite_index // (_SHEET_SIZE // _TILE)) * _TILE
+        for row in range(_TILE):
+            start = (top + row) * _SHEET_SIZE + left
+            for column in range(_TILE):
+                self.pen = sheet[start + column]
+                if self.pen:
+                    self._fill(x + column * scale, y + row * scale, scale, scale)
+        self.pen = pen
+
+    # Framebuffer access
+
+    def get_framebuffer(self):
+        """Return the current layer as a flat, writable buffer of pens."""
+        if numpy is not None:
+            return memoryview(self.framebuffer[self.layer].reshape(-1))
+        return memoryview(self.framebuffer[self.layer])
+
+    def pixel_at(self, x, y, layer=0):
+        """Return the pen value at a pixel (simulator only)."""
+        if numpy is not None:
+            return int(self.framebuffer[layer, y, x])
+        return self.framebuffer[layer][y * self.width + x]
+
+    def _fill(self, x, y, w, h):
+        cx, cy, cx2, cy2 = self.clip
+        x2 = min(x + w, cx2)
+        y2 = min(y + h, cy2)
+        x = max(x, cx)
+        y = max(y, cy)
+        if x2 <= x or y2 <= y:
+            return
+        if numpy is not None:
+            self.framebuffer[self.layer, y:y2, x:x2] = self.pen
+            return
+        layer = self.framebuffer[self.layer]
+        span = array(layer.typecode, (self.pen,)) * (x2 - x)
+        for row in range(y, y2):
+            start = row * self.width + x
+            layer[start:start + len(span)] = span
@@ -0,0 +1,36 @@
+"""Stand-in for the ``touch`` module.
+
+``FT6236.stream`` is a callable that returns the first touch point as
+``(x, y, touched)`` for the current time in ms, in display pixels. The default
+slides a finger back and forth along the bottom of the screen and lifts it
+every few seconds, which also taps to start a game.
+"""
+
+from . import utime
+
+
+def demo_touch(now_ms):
+    """Default input: sweep along the bottom, lifting off now and then."""
+    phase = now_ms % 4000
+    x = phase * 240 // 2000 if phase < 2000 else (4000 - phase) * 240 // 2000
+    return x, 230, phase % 3000 > 100
+
+
+class FT6236(object):
+    """FT6236."""
+
+    stream = demo_touch
+
+    def __init__(self, full_res=False):
+        self.full_res = full_res
+        self.x = self.y = self.x2 = self.y2 = 0
+        self.state = self.state2 = False
+        self.distance = 0
+        self.angle = 0
+        self.polls = 0
+
+    def poll(self):
+        self.polls += 1
+        x, y, touched = FT6236.stream(utime.ticks_ms())
+        scale = 2 if self.full_res else 1
+        self.x, self.y, self.state = x * scale, y * scale, touched
@@ -0,0 +1,61 @@
+"""Stand-in for MicroPython's ``asyncio`` running on the virtual clock.
+
+Sleeping coroutines register a wake time. Whichever sleeper is due first
+moves the clock forward, so concurrent sleeps overlap the way they do on the
+board instead of adding up.
+"""
+
+import asyncio as _host_asyncio
+
+from . import utime
+from .clock import SimulationComplete
+
+_host_sleep = _host_asyncio.sleep
+
+
+async def sleep_ms(ms):
+    clock = utime.clock
+    wake = clock.us + max(0, int(ms * 1000))
+    sleepers = clock.sleepers
+    sleepers.append(wake)
+    try:
+        while True:
+            clock.main_idle = True
+            await _host_sleep(0)
+            clock.main_idle = False
+            if clock.us >= wake:
+                return
+            if wake == min(sleepers):
+                clock.advance_us(wake - clock.us)
+                return
+    finally:
+        sleepers.remove(wake)
+
+
+async def sleep(seconds):
+    await sleep_ms(seconds * 1000)
+
+
+def run(main):
+    """Run the game's main coroutine until it returns or the clock runs out."""
+    loop = _host_asyncio.new_event_loop()
+    _host_asyncio.set_event_loop(loop)
+
+    def on_error(loop, context):
+        # Background tasks can be the ones to hit the deadline
+        if not isinstance(context.get("exception"), SimulationComplete):
+            loop.default_exception_handler(context)
+
+    loop.set_exception_handler(on_error)
+    try:
+        return loop.run_until_complete(main)
+    finally:
+        for task in _host_asyncio.all_tasks(loop):
+            task.cancel()
+        loop.run_until_complete(_host_asyncio.gather(
+            *_host_asyncio.all_tasks(loop), return_exceptions=True))
+        loop.close()
+
+
+def __getattr__(name):
+    return getattr(_host_asyncio, name)
@@ -0,0 +1,44 @@
+"""Stand-in for MicroPython's ``utime`` (also installed over ``time``).
+
+Anything not modelled here falls through to the host ``time`` module.
+"""
+
+import _thread
+import time as _host_time
+
+clock = None
+
+
+def ticks_ms():
+    return clock.ticks_ms()
+
+
+def ticks_us():
+    return clock.ticks_us()
+
+
+def ticks_add(ticks, delta):
+    return ticks + delta
+
+
+def ticks_diff(ticks1, ticks2):
+    return ticks1 - ticks2
+
+
+def sleep_ms(ms):
+    sleep_us(ms * 1000)
+
+
+def sleep_us(us):
+    if _thread.get_ident() == clock.main_thread:
+        clock.advance_us(int(us))
+    else:
+        clock.sleep_thread_us(us)
+
+
+def sleep(seconds):
+    clock.advance_ms(seconds * 1000)
+
+
+def __getattr__(name):
+    return getattr(_host_time, name)
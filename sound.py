@@ -0,0 +1,160 @@
+"""Non-blocking tunes on the Presto's buzzer.
+
+Tunes are written as note names and parsed once, when the game loads, into
+arrays of frequency and duration pairs. ``SoundEngine`` queues tunes and a
+background task moves to the next note when one is due, sleeping in between,
+so playing a sound never blocks the frame loop. Each note change is a single
+PWM write. A tune that interrupts cuts the task's sleep short, so it moves on
+when the new note ends rather than when the old one would have.
+"""
+
+import asyncio
+from array import array
+
+from utime import ticks_ms, ticks_diff, ticks_add
+
+_SEMITONES = {"c": 0, "d": 2, "e": 4, "f": 5, "g": 7, "a": 9, "b": 11}
+
+
+def note(name):
+    """Return the frequency in Hz of a note name like ``c6`` or ``f#4``,
+    or 0 for a rest (``r``)."""
+    name = name.lower()
+    if name == "r":
+        return 0
+    semitone = _SEMITONES[name[0]]
+    octave = name[1:]
+    if octave[0] == "#":
+        semitone += 1
+        octave = octave[1:]
+    elif octave[0] == "b" and len(octave) > 1:
+        semitone -= 1
+        octave = octave[1:]
+    # A4, MIDI note 69, is 440 Hz
+    midi = 12 * (int(octave) + 1) + semitone
+    return int(440 * 2 ** ((midi - 69) / 12) + 0.5)
+
+
+def tune(notes):
+    """Parse a tune into an array of frequency and duration pairs.
+
+    Args:
+        notes (str): Space separated ``note:ms``, e.g. ``"g4:500 c5:200"``.
+            A note can also be a frequency in Hz, e.g. ``"900:10"``.
+    """
+    parsed = array("H")
+    for part in notes.split():
+        name, ms = part.split(":")
+        parsed.append(int(name) if name[0].isdigit() else note(name))
+        parsed.append(int(ms))
+    return parsed
+
+
+class SoundEngine(object):
+    """SoundEngine."""
+
+    def __init__(self, buzzer, queue=4):
+        """Initialize sound engine.
+
+        Args:
+            buzzer: my_presto Buzzer to play on.
+            queue (Optional int): Most tunes waiting to play. Tunes played
+                when the queue is full are dropped.
+        """
+        self.buzzer = buzzer
+        self.queue = [None] * queue
+        self.head = 0
+        self.queued = 0
+        self.tune = None
+        self.position = 0
+        self.note_end = 0
+        # Wakes the background task when a tune is queued while idle
+        self.wake = asyncio.Event()
+        # The background task, whether it is sleeping until a note ends, and
+        # whether play() cut that sleep short
+        self.task = None
+        self.sleeping = False
+        self.interrupted = False
+
+    def play(self, tune, interrupt=False):
+        """Queue a tune from ``tune()``.
+
+        Args:
+            tune (array): Tune to play.
+            interrupt (Optional bool): Stop whatever is playing and drop the
+                queue first, for sounds that matter more than the rest.
+        """
+        if interrupt:
+            self.stop()
+            if self.sleeping:
+                # Cancelling is the only way to cut a sleep short, and it
+                # only allocates here rather than on every note
+                self.sleeping = False
+                self.interrupted = True
+                self.task.cancel()
+        elif tune is self.tune and self.position == 0:
+            # Already starting, e.g. several bounces in one step
+            return
+        if self.queued == len(self.queue):
+            return
+        self.queue[(self.head + self.queued) % len(self.queue)] = tune
+        self.queued += 1
+        if self.tune is None:
+            # Start now rather than when the task next runs
+            self.update()
+            self.wake.set()
+
+    def stop(self):
+        """Silence the buzzer and drop all queued tunes."""
+        self.tune = None
+        self.queued = 0
+        self.buzzer.set_tone(0)
+
+    def update(self, now=None):
+        """Start the next note if the current one is over.
+
+        Returns:
+            Milliseconds until the next note is due, or None if idle.
+        """
+        if now is None:
+            now = ticks_ms()
+        if self.tune is not None:
+            remaining = ticks_diff(self.note_end, now)
+            if remaining > 0:
+                return remaining
+            self.position += 2
+            if self.position >= len(self.tune):
+                self.tune = None
+        if self.tune is None:
+            if not self.queued:
+                self.buzzer.set_tone(0)
+                return None
+            self.tune = self.queue[self.head]
+            self.queue[self.head] = None
+            self.head = (self.head + 1) % len(self.queue)
+            self.queued -= 1
+            self.position = 0
+        frequency = self.tune[self.position]
+        duration = self.tune[self.position + 1]
+        self.buzzer.set_tone(frequency)
+        self.note_end = ticks_add(now, duration)
+        return duration
+
+    async def run(self):
+        """Play queued tunes forever, as a background task."""
+        self.task = asyncio.current_task()
+        while True:
+            wait = self.update()
+            if wait is None:
+                await self.wake.wait()
+                self.wake.clear()
+                continue
+            self.sleeping = True
+            try:
+                await asyncio.sleep_ms(wait)
+            except asyncio.CancelledError:
+                # Only an interrupting tune carries on, anything else stops
+                if not self.interrupted:
+                    raise
+                self.interrupted = False
+            self.sleeping = False
@@ -0,0 +1,88 @@
+"""Spritesheet built at runtime from pixels drawn on the display.
+
+PicoGraphics draws sprites from a 128x128 sheet of 8x8 RGB332 tiles, where
+colour 0 is transparent. ``SpriteSheet`` hands out tiles and fills them by
+copying what was just drawn to the framebuffer, so anything expensive to draw,
+like text, only has to be rasterized once, or by filling them directly.
+"""
+
+from micropython import const
+
+TILE = const(8)
+TILES = const(256)
+_SHEET_SIZE = const(128)
+_COLUMNS = const(16)
+
+
+class SpriteSheet(object):
+    """SpriteSheet."""
+
+    def __init__(self, display):
+        """Initialize spritesheet.
+
+        Args:
+            display: PicoGraphics display using the RGB332 pen, drawn on at
+                its native resolution to make tiles.
+        """
+        self.display = display
+        self.data = bytearray(_SHEET_SIZE * _SHEET_SIZE)
+        self.used = 0
+
+    def allocate(self, count):
+        """Reserve a row of tiles, side by side in the sheet.
+
+        Returns:
+            Index of the first tile.
+        """
+        first = self.used
+        if first % _COLUMNS + count > _COLUMNS:
+            # Start a new row of the sheet so the tiles stay adjacent
+            first += _COLUMNS - first % _COLUMNS
+        if first + count > TILES:
+            raise ValueError("spritesheet full")
+        self.used = first + count
+        return first
+
+    def capture(self, x, y, count):
+        """Copy a row of tiles from the framebuffer into new tiles.
+
+        Args:
+            x, y (int): Top left of the row on screen.
+            count (int): Number of tiles, left to right.
+
+        Returns:
+            Index of the first tile.
+        """
+        first = self.allocate(count)
+        framebuffer = self.display.get_framebuffer()
+        width = self.display.get_bounds()[0]
+        data = self.data
+        for i in range(count):
+            tile = first + i
+            dest = (tile // _COLUMNS) * TILE * _SHEET_SIZE + (tile % _COLUMNS) * TILE
+            source = y * width + x + i * TILE
+            for _ in range(TILE):
+                data[dest:dest + TILE] = framebuffer[source:source + TILE]
+                dest += _SHEET_SIZE
+                source += width
+        return first
+
+    def fill(self, tile, x, y, width, height, color):
+        """Fill a rectangle of a row of tiles with a colour.
+
+        Args:
+            tile (int): First tile of the row, from ``allocate``.
+            x, y (int): Top left, relative to the first tile.
+            width, height (int): Size, which may span several tiles.
+            color (int): RGB332 colour, 0 for transparent.
+        """
+        data = self.data
+        start = ((tile // _COLUMNS) * TILE + y) * _SHEET_SIZE + (tile % _COLUMNS) * TILE + x
+        for row in range(height):
+            offset = start + row * _SHEET_SIZE
+            for column in range(width):
+                data[offset + column] = color
+
+    def install(self):
+        """Make this the sheet ``sprite()`` draws from."""
+        self.display.set_spritesheet(self.data)
@@ -0,0 +1,169 @@
+"""Build a level pack for the game from a text description.
+
+    python tools/build_levels.py levels.txt levels.bin
+
+Then copy the pack to the Presto next to main.py. The text file describes
+each level as a grid of bricks, one character per cell::
+
+    # Comments start with a hash
+    level                     starts a new level
+    brick R 200 60 60         R is a red brick...
+    brick S 150 150 150 3     ...S a grey one that takes three hits
+    step 25 10                optional cell pitch, default 25 10
+    size 20 5                 optional brick size, no bigger than the step,
+                              default 20 5
+    left 20                   optional left edge, default centres the grid
+    top 30                    optional top edge, 30 to 255, default 30
+    RRRRRRRR                  the grid, "." for no brick
+    .SSSSSS.
+
+Bricks defined before the first level are shared by every level. The binary
+format is described in levels.py.
+"""
+
+import argparse
+import struct
+import sys
+
+MAGIC = b"BRKL"
+VERSION = 1
+PLAYFIELD = 240
+MAX_COLORS = 16
+MAX_HIT_POINTS = 15
+MAX_CELLS = 256
+# The top wall and HUD are above this, and the level header stores top in a byte
+MIN_TOP = 30
+MAX_TOP = 255
+# Bricks have to end a ball's height above the paddle row, or the ball can
+# never get under them to hit them
+PADDLE_Y = 230
+BALL_SIZE = 10
+# Brick sprites are a row of three 8x8 tiles
+MAX_BRICK_WIDTH = 24
+MAX_BRICK_HEIGHT = 8
+
+
+class Level(object):
+    """One level being parsed."""
+
+    def __init__(self, bricks):
+        self.bricks = dict(bricks)
+        self.step = (25, 10)
+        self.size = (20, 5)
+        self.left = None
+        self.top = 30
+        self.rows = []
+
+    def pack(self, number):
+        if not self.rows:
+            raise ValueError("level %d has no bricks" % number)
+        columns = max(len(row) for row in self.rows)
+        rows = len(self.rows)
+        if columns * rows > MAX_CELLS:
+            raise ValueError("level %d has more than %d cells" % (number, MAX_CELLS))
+        column_step, row_step = self.step
+        width, height = self.size
+        left = self.left
+        if left is None:
+            left = (PLAYFIELD - (columns - 1) * column_step - width) // 2
+        if not (1 <= column_step <= 255 and 1 <= row_step <= 255):
+            raise ValueError("level %d step must be 1 to 255 each way" % number)
+        # The game only checks the cells a ball is over, so a brick must not
+        # spill into the next cell
+        if not 1 <= width <= column_step or not 1 <= height <= row_step:
+            raise ValueError("level %d bricks must be at least 1x1 and fit in a %dx%d cell"
+                             % (number, column_step, row_step))
+        if width > MAX_BRICK_WIDTH or height > MAX_BRICK_HEIGHT:
+            raise ValueError("level %d bricks are bigger than %dx%d, too big for sprites"
+                             % (number, MAX_BRICK_WIDTH, MAX_BRICK_HEIGHT))
+        if left < 0 or left + (columns - 1) * column_step + width > PLAYFIELD:
+            raise ValueError("level %d is wider than the playfield" % number)
+        if not MIN_TOP <= self.top <= MAX_TOP:
+            raise ValueError("level %d top must be %d to %d" % (number, MIN_TOP, MAX_TOP))
+        if self.top + (rows - 1) * row_step + height > PADDLE_Y - BALL_SIZE:
+            raise ValueError("level %d reaches too close to the paddle, bricks must end by y=%d"
+                             % (number, PADDLE_Y - BALL_SIZE))
+        colors = []
+        cells = bytearray()
+        for row in self.rows:
+            for char in row.ljust(columns, "."):
+                if char == ".":
+                    cells.append(0)
+                    continue
+                if char not in self.bricks:
+                    raise ValueError("level %d uses undefined brick %r" % (number, char))
+                rgb, hit_points = self.bricks[char]
+                if rgb not in colors:
+                    colors.append(rgb)
+                cells.append(colors.index(rgb) << 4 | hit_points)
+        if len(colors) > MAX_COLORS:
+            raise ValueError("level %d has more than %d colours" % (number, MAX_COLORS))
+        if not any(cell & 0x0F for cell in cells):
+            raise ValueError("level %d has no bricks" % number)
+        data = struct.pack("<9B", left, self.top, columns, rows, column_step,
+                           row_step, width, height, len(colors))
+        for rgb in colors:
+            data += bytes(rgb)
+        return data + bytes(cells)
+
+
+def parse(lines):
+    """Parse a level description into a list of Levels."""
+    bricks = {}
+    levels = []
+    for number, line in enumerate(lines, 1):
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        words = line.split()
+        try:
+            if words[0] == "level":
+                levels.append(Level(bricks))
+            elif words[0] == "brick":
+                char = words[1]
+                if len(char) != 1 or char == ".":
+                    raise ValueError("brick must be one character other than '.'")
+                rgb = tuple(int(value) for value in words[2:5])
+                hit_points = int(words[5]) if len(words) > 5 else 1
+                if len(rgb) != 3 or not all(0 <= value <= 255 for value in rgb):
+                    raise ValueError("brick colour must be three values from 0 to 255")
+                if not 1 <= hit_points <= MAX_HIT_POINTS:
+                    raise ValueError("hit points must be 1 to %d" % MAX_HIT_POINTS)
+                (levels[-1].bricks if levels else bricks)[char] = (rgb, hit_points)
+            elif not levels:
+                raise ValueError("expected 'level' or 'brick'")
+            elif words[0] in ("step", "size"):
+                setattr(levels[-1], words[0], (int(words[1]), int(words[2])))
+            elif words[0] in ("left", "top"):
+                setattr(levels[-1], words[0], int(words[1]))
+            elif len(words) == 1:
+                levels[-1].rows.append(words[0])
+            else:
+                raise ValueError("unknown line")
+        except (ValueError, IndexError) as e:
+            raise SystemExit("line %d: %s" % (number, e))
+    return levels
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a Breakout level pack.")
+    parser.add_argument("source", help="level description")
+    parser.add_argument("output", help="level pack to write")
+    args = parser.parse_args()
+    with open(args.source) as f:
+        levels = parse(f)
+    if not 1 <= len(levels) <= 255:
+        raise SystemExit("a pack holds 1 to 255 levels")
+    data = MAGIC + bytes((VERSION, len(levels)))
+    for number, level in enumerate(levels, 1):
+        try:
+            data += level.pack(number)
+        except ValueError as e:
+            raise SystemExit(str(e))
+    with open(args.output, "wb") as f:
+        f.write(data)
+    print("%d levels, %d bytes" % (len(levels), len(data)), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()